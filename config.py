@@ -1,14 +1,45 @@
 import os
 from pathlib import Path
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Final
+
 from dotenv import load_dotenv
 
-load_dotenv()
+# Guard so re-imports (e.g. Streamlit reruns reloading this module) don't re-parse `.env`
+if not globals().get("_DOTENV_LOADED"):
+    load_dotenv()
+    _DOTENV_LOADED = True
+
+# Snapshot the environment once; every constant below is read from it a single time
+_env = os.environ.copy()
 
 #  OpenAI API key
-API_KEY = os.getenv("OPENAI_API_KEY")
-STATIC_TOKEN = os.getenv("STATIC_TOKEN")
+API_KEY: Final[str | None] = _env.get("OPENAI_API_KEY")
+STATIC_TOKEN: Final[str | None] = _env.get("STATIC_TOKEN")
+
+MONGO_CLUSTER_URI: Final[str | None] = _env.get("MONGO_CLUSTER_URI")
+MONGO_DATABASE: Final[str] = _env.get("MONGO_DATABASE", "AutoRFP")
+
+SANKEY_TEMPLATE_PATH: Final[Path] = Path("templates/sankey.html")
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    api_key: str | None
+    static_token: str | None
+    mongo_cluster_uri: str | None
+    mongo_database: str
+    sankey_template_path: Path
 
-MONGO_CLUSTER_URI = os.getenv("MONGO_CLUSTER_URI")
-MONGO_DATABASE = os.getenv("MONGO_DATABASE", "AutoRFP")
 
-SANKEY_TEMPLATE_PATH = Path("templates/sankey.html")
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Returns the application config as a single frozen bundle."""
+    return Config(
+        api_key=API_KEY,
+        static_token=STATIC_TOKEN,
+        mongo_cluster_uri=MONGO_CLUSTER_URI,
+        mongo_database=MONGO_DATABASE,
+        sankey_template_path=SANKEY_TEMPLATE_PATH,
+    )
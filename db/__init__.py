@@ -13,7 +13,8 @@ Main Methodology:
 
 Important Notes:
 - MongoDB is set as the default database backend through the `getDB` object. This provides
-  a preconfigured MongoDB instance ready for use throughout the application.
+  a preconfigured MongoDB instance ready for use throughout the application. The instance
+  is created on first access of `getDB`, not at import time.
 - The use of an abstract database class ensures that all database operations adhere to a
   predefined structure, promoting consistency and reducing the risk of errors.
 - Developers can extend the database capabilities by importing additional database classes
@@ -30,18 +31,33 @@ Usage:
 This module plays a crucial role in the application architecture, ensuring that database
 interactions are efficient, reliable, and adaptable to varying requirements.
 """
-from db.mongodb import MongoDB
-
-getDB = MongoDB()
-"""
-Returns a AbstractDB instance for the given collection name
-
-Args:
-    collection (str): The name of the collection to get the DB for
-    
-Returns:
-    AbstractDB: The AbstractDB instance
-"""
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from db.mongodb import MongoDB
+
+_db: "MongoDB | None" = None
+_db_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    """
+    Lazily builds `getDB` on first access (PEP 562), so importing `db` doesn't import
+    pymongo or set up a client until the database is actually needed.
+
+    `getDB` is the shared MongoDB instance; `getDB(collection)` returns the AbstractDB
+    instance for the given collection name.
+    """
+    if name == "getDB":
+        global _db
+        if _db is None:
+            with _db_lock:
+                if _db is None:
+                    from db.mongodb import MongoDB
+                    _db = MongoDB()
+        return _db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = ["getDB"]
@@ -1,12 +1,27 @@
+import time
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Self, Union
+from typing import Any, Dict, Iterator, List, Self, Union
 
 
 KEY_FIELD = "__key__"
 TIMESTAMP_FIELD = "timestamp"
 
 
+@lru_cache(maxsize=1)
+def _iso_for_second(second: int) -> str:
+    return datetime.fromtimestamp(second, timezone.utc).isoformat()
+
+def _now_iso_cached() -> str:
+    """
+    Current UTC time as an ISO string, at second resolution.
+
+    The string is cached per second, so writes landing in the same second share it.
+    """
+    return _iso_for_second(int(time.time()))
+
+
 class AbstractDB(ABC):
     """
     Abstract class for database operations.
@@ -73,7 +88,10 @@ class AbstractDB(ABC):
         Returns:
             list[Dict[str, Any]]
         """
-        [obj.pop(KEY_FIELD, None) for obj in objs if isinstance(obj, dict)]
+        pop = dict.pop
+        for obj in objs:
+            if isinstance(obj, dict):
+                pop(obj, KEY_FIELD, None)
         return objs
     
     @staticmethod
@@ -88,9 +106,10 @@ class AbstractDB(ABC):
         Returns:
             list[Dict[str, Any]]
         """
-        ts = datetime.now(timezone.utc).isoformat()
+        ts = _now_iso_cached()
+        setitem = dict.__setitem__
         for obj in objs:
-            obj[TIMESTAMP_FIELD] = ts
+            setitem(obj, TIMESTAMP_FIELD, ts)
         return objs
     
     @abstractmethod
@@ -175,8 +194,38 @@ class AbstractDB(ABC):
         res = self._get_all()
         return self._remove_key_field(res)
     
+    def _iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all documents in the database.
+
+        The default implementation falls back to `_get_all`; subclasses should override it
+        to stream documents as they arrive.
+
+        Parameters:
+            batch_size: int
+                The number of documents to fetch per round-trip, where supported.
+
+        Returns:
+            Iterator[Dict[str, Any]]
+        """
+        yield from self._get_all()
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all documents in the database, removing the key field from each.
+
+        Parameters:
+            batch_size: int
+                The number of documents to fetch per round-trip, where supported.
+
+        Returns:
+            Iterator[Dict[str, Any]]
+        """
+        for doc in self._iter_all(batch_size=batch_size):
+            yield self._remove_key_field([doc])[0]
+
     @abstractmethod
-    def _query(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _query(self, query: Dict[str, Any], projection: Union[Dict[str, Any], None] = None) -> List[Dict[str, Any]]:
         """
         Query the database with the given query.
 
@@ -185,26 +234,74 @@ class AbstractDB(ABC):
         Parameters:
             query: Dict[str, Any]
                 The query to be executed.
+            projection: Dict[str, Any], optional
+                The fields to include or exclude in the returned documents.
+                Defaults to None, which returns whole documents.
 
         Returns:
             List[Dict[str, Any]]
         """
         pass
 
-    def query(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def query(self, query: Dict[str, Any], projection: Union[Dict[str, Any], None] = None) -> List[Dict[str, Any]]:
         """
         Query the database with the given query and remove the key field.
 
         Parameters:
             query: Dict[str, Any]
                 The query to be executed.
+            projection: Dict[str, Any], optional
+                The fields to include or exclude in the returned documents.
+                Defaults to None, which returns whole documents.
 
         Returns:
             List[Dict[str, Any]]
         """
-        res = self._query(query)
+        res = self._query(query, projection=projection)
         return self._remove_key_field(res)
 
+    def _iter_query(
+        self, query: Dict[str, Any], projection: Union[Dict[str, Any], None] = None, batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the documents matching the given query.
+
+        The default implementation falls back to `_query`; subclasses should override it
+        to stream documents as they arrive.
+
+        Parameters:
+            query: Dict[str, Any]
+                The query to be executed.
+            projection: Dict[str, Any], optional
+                The fields to include or exclude in the returned documents.
+            batch_size: int
+                The number of documents to fetch per round-trip, where supported.
+
+        Returns:
+            Iterator[Dict[str, Any]]
+        """
+        yield from self._query(query, projection=projection)
+
+    def iter_query(
+        self, query: Dict[str, Any], projection: Union[Dict[str, Any], None] = None, batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the documents matching the given query, removing the key field from each.
+
+        Parameters:
+            query: Dict[str, Any]
+                The query to be executed.
+            projection: Dict[str, Any], optional
+                The fields to include or exclude in the returned documents.
+            batch_size: int
+                The number of documents to fetch per round-trip, where supported.
+
+        Returns:
+            Iterator[Dict[str, Any]]
+        """
+        for doc in self._iter_query(query, projection=projection, batch_size=batch_size):
+            yield self._remove_key_field([doc])[0]
+
     @abstractmethod
     def _insert(self, value: Dict[str, Any], key: str) -> bool:
         """
@@ -237,7 +334,7 @@ class AbstractDB(ABC):
             bool
         """
         value[KEY_FIELD] = key
-        value = self._add_timestamp([value])[0]
+        value[TIMESTAMP_FIELD] = _now_iso_cached()
         return self._insert(value, key)
 
     @abstractmethod
@@ -254,7 +351,7 @@ class AbstractDB(ABC):
                 The keys of the documents to be inserted.
 
         Returns:
-            bool
+            bool: True only if every document was written, see `insert_many`.
         """
         pass
 
@@ -269,7 +366,8 @@ class AbstractDB(ABC):
                 The keys of the documents to be inserted.
 
         Returns:
-            bool
+            bool: True if every document was written. On a partial failure the documents that
+                could be written still are, and False is returned.
         """
         for key, value in zip(keys, values):
             value[KEY_FIELD] = key
@@ -307,7 +405,7 @@ class AbstractDB(ABC):
         Returns:
             bool
         """
-        value = self._add_timestamp([value])[0]
+        value[TIMESTAMP_FIELD] = _now_iso_cached()
         return self._update(value, key)
 
     @abstractmethod
@@ -341,10 +439,48 @@ class AbstractDB(ABC):
         Returns:
             bool
         """
-        value = self._add_timestamp([value])[0]
+        value[TIMESTAMP_FIELD] = _now_iso_cached()
         value[KEY_FIELD] = key
         return self._upsert(value, key)
 
+    def _upsert_many(self, values: List[Dict[str, Any]], keys: List[str]) -> bool:
+        """
+        Upsert multiple documents in the database.
+
+        The default implementation upserts the documents one by one; subclasses should
+        override it to upsert them in as few round-trips as possible.
+
+        Parameters:
+            values: List[Dict[str, Any]]
+                The documents to be upserted.
+            keys: List[str]
+                The keys of the documents to be upserted.
+
+        Returns:
+            bool: True only if every document was written, see `upsert_many`.
+        """
+        results = [self._upsert(value, key) for key, value in zip(keys, values)]
+        return all(results)
+
+    def upsert_many(self, values: List[Dict[str, Any]], keys: List[str]) -> bool:
+        """
+        Upsert multiple documents in the database with the given keys.
+
+        Parameters:
+            values: List[Dict[str, Any]]
+                The documents to be upserted.
+            keys: List[str]
+                The keys of the documents to be upserted.
+
+        Returns:
+            bool: True if every document was written. On a partial failure the documents that
+                could be written still are, and False is returned.
+        """
+        for key, value in zip(keys, values):
+            value[KEY_FIELD] = key
+        values = self._add_timestamp(values)
+        return self._upsert_many(values, keys)
+
     @abstractmethod
     def _delete(self, key: str) -> bool:
         """
@@ -394,11 +530,15 @@ class AbstractDB(ABC):
         """
         Delete multiple documents from the database.
 
+        Implementations should delete all keys in as few round-trips as possible
+        rather than deleting them one by one.
+
         Parameters:
             keys: List[str]
                 The keys of the documents to be deleted.
 
         Returns:
             List[bool]
+                One entry per key, True if a document with that key existed and was deleted.
         """
         return self._delete_many(keys)
@@ -1,7 +1,10 @@
+import threading
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List
 
+from pymongo import UpdateOne
 from pymongo.server_api import ServerApi
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 from pymongo.mongo_client import MongoClient
 
 from db.abstractdb import AbstractDB
@@ -10,6 +13,10 @@ from config import MONGO_CLUSTER_URI, MONGO_DATABASE
 TIMESTAMP_KEY = "timestamp"
 KEY_FIELD = "__key__"
 INBUILD_ID_FIELD = "_id"
+DEFAULT_PROJECTION = {INBUILD_ID_FIELD: False, KEY_FIELD: False}
+"""Fields never returned by reads, since AbstractDB strips them anyway"""
+DEFAULT_BATCH_SIZE = 1000
+"""Documents pulled per cursor round-trip (pymongo's default first batch is 101)"""
 
 
 class MongoDB(AbstractDB):
@@ -21,14 +28,16 @@ class MongoDB(AbstractDB):
     a key and timestamp for tracking purposes.
 
     Main Methodology:
-    - Utilizes a MongoClient to connect to the MongoDB cluster specified by the URI.
+    - Utilizes a MongoClient to connect to the MongoDB cluster specified by the URI. The client is
+      created lazily on first access and shared for the lifetime of the instance.
     - Each collection is accessed via the __call__ method, which sets the active collection.
     - CRUD operations are implemented with MongoDB's native methods, ensuring efficient data handling.
     - The class supports querying with custom filters, projections, sorting, and limiting the number of results.
 
     Important Notes:
     - Includes exception handling for database operations to ensure robustness.
-    - The INBUILD_ID_FIELD is excluded from all projections by default for data consistency.
+    - The INBUILD_ID_FIELD and KEY_FIELD are excluded from read projections by default, so they
+      are never sent over the wire.
     - Supports upserting, which inserts a document if it doesn't exist or updates it if it does.
     - Provides logging for database operation failures, aiding in debugging and monitoring.
     """
@@ -44,17 +53,46 @@ class MongoDB(AbstractDB):
         Returns:
             None
 
+        Notes:
+            - No connection is made here; the client is built on first use of `client`.
+        """
+        super().__init__()
+        self.uri = uri
+        self.database = database
+        self._client: MongoClient | None = None
+        self._client_lock = threading.Lock()
+        self._indexes: Dict[tuple[str, str], bool] = {}
+        self._writers: Dict[tuple[str, str], Callable[[Dict[str, Any], str], Any]] = {}
+
+    @property
+    def client(self) -> MongoClient:
+        """
+        The shared MongoClient, created on first access.
+
         Notes:
             - Utilizes the 1st generation of the MongoDB Server API for improved performance.
             - Sets the heartbeat frequency to 30 seconds to ensure efficient connection maintenance.
+            - Keeps a warm pool of connections (`minPoolSize`) so the first queries don't pay
+              for the connection handshake.
         """
-        super().__init__()
-        self.client = MongoClient(
-            uri, 
-            server_api=ServerApi('1'), 
-            heartbeatFrequencyMS=30000, 
-        )
-        self.db = self.client.get_database(name=database)
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = MongoClient(
+                        self.uri, 
+                        server_api=ServerApi('1'), 
+                        minPoolSize=10, 
+                        maxPoolSize=50, 
+                        maxIdleTimeMS=60000, 
+                        heartbeatFrequencyMS=30000, 
+                        retryWrites=True, 
+                    )
+        return self._client
+
+    @property
+    def db(self):
+        """The database handle for `self.database`."""
+        return self.client.get_database(name=self.database)
         
     def __call__(self, collection: str):
         """
@@ -69,22 +107,94 @@ class MongoDB(AbstractDB):
         Notes:
             This method configures the MongoDB instance to point to the given collection,
             allowing for CRUD operations on that specific collection.
+            The first time a collection is used, an index on KEY_FIELD is created
+            so key lookups don't scan the whole collection.
         """
         self.collection = self.db.get_collection(name=collection)
+        self.create_index([(KEY_FIELD, 1)])
         return self
     
+    def create_index(self, keys: str | List[tuple[str, int]], **kwargs: Any) -> bool:
+        """
+        Create an index on the active collection, once per process.
+
+        Parameters:
+            keys (str | List[tuple[str, int]]): The field name or list of (field, direction) pairs to index.
+            **kwargs: Options passed to pymongo's `create_index` (e.g. `expireAfterSeconds`, `unique`).
+
+        Returns:
+            bool: True if the index exists (or was already created earlier), False if creation failed.
+
+        Notes:
+            Creating an index that already exists with the same options is a no-op on the
+            server, but the call is still skipped after the first attempt to save a round-trip.
+            A refusal by the server (e.g. missing privileges, a conflicting index) is remembered
+            too, so it is reported once instead of on every call; only connection-level errors
+            are retried on the next call.
+        """
+        memo_key = (self.collection.name, repr((keys, sorted(kwargs.items()))))
+        if memo_key in self._indexes:
+            return self._indexes[memo_key]
+        try:
+            self.collection.create_index(keys, **kwargs)
+        except OperationFailure as e:
+            print(f"Create index failed, not retrying: {e}")
+            self._indexes[memo_key] = False
+            return False
+        except PyMongoError as e:
+            print(f"Create index failed: {e}")
+            return False
+        self._indexes[memo_key] = True
+        return True
+
     def _get(self, key: str) -> Dict[str, Any]:
-        return self.collection.find_one(filter={KEY_FIELD: key}, projection={INBUILD_ID_FIELD: False}) or {}
+        return self.collection.find_one(filter={KEY_FIELD: key}, projection=DEFAULT_PROJECTION) or {}
 
     def _get_many(self, key: str) -> List[Dict[str, Any]]:
-        return list(self.collection.find(filter={KEY_FIELD: key}, projection={INBUILD_ID_FIELD: False}))
+        return list(
+            self.collection.find(filter={KEY_FIELD: key}, projection=DEFAULT_PROJECTION).batch_size(DEFAULT_BATCH_SIZE)
+        )
+
+    def _iter_all(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        yield from self.collection.find(projection=DEFAULT_PROJECTION).batch_size(batch_size)
 
     def _get_all(self) -> List[Dict[str, Any]]:
-        return list(self.collection.find(projection={INBUILD_ID_FIELD: False}))
+        return list(self._iter_all())
+
+    def _make_inserter(self) -> Callable[[Dict[str, Any], str], Any]:
+        insert_one = self.collection.insert_one
+        now = datetime.now
+        kf, tk = KEY_FIELD, TIMESTAMP_KEY
+
+        def insert(value: Dict[str, Any], key: str):
+            return insert_one({kf: key, tk: now(), **value})
+        return insert
+
+    def _make_upserter(self) -> Callable[[Dict[str, Any], str], Any]:
+        update_one = self.collection.update_one
+        kf = KEY_FIELD
+
+        def upsert(value: Dict[str, Any], key: str):
+            return update_one({kf: key}, {"$set": value}, upsert=True)
+        return upsert
+
+    def _writer(self, kind: str) -> Callable[[Dict[str, Any], str], Any]:
+        """
+        Returns the write function of the given kind (`insert` or `upsert`) for the active collection.
+
+        The functions bind the collection method and constants as locals once per collection,
+        skipping the attribute lookups on every call in tight write loops.
+        """
+        memo_key = (self.collection.name, kind)
+        writer = self._writers.get(memo_key)
+        if writer is None:
+            factory = self._make_inserter if kind == "insert" else self._make_upserter
+            writer = self._writers[memo_key] = factory()
+        return writer
 
     def _insert(self, value: Dict[str, Any], key: str) -> bool:
         try:
-            self.collection.insert_one({KEY_FIELD: key, TIMESTAMP_KEY: datetime.now(), **value})
+            self._writer("insert")(value, key)
             return True
         except Exception as e:
             print(f"Insert failed: {e}")
@@ -92,8 +202,13 @@ class MongoDB(AbstractDB):
 
     def _insert_many(self, values: List[Dict[str, Any]], keys: List[str]) -> bool:
         try:
-            self.collection.insert_many(values)
+            # Unordered so one bad document doesn't stop the rest from being inserted
+            self.collection.insert_many(values, ordered=False)
             return True
+        except BulkWriteError as e:
+            n_failed = len(e.details.get("writeErrors", []))
+            print(f"Insert many partially failed: {n_failed}/{len(values)} documents not inserted")
+            return False
         except Exception as e:
             print(f"Insert many failed: {e}")
             return False
@@ -108,12 +223,30 @@ class MongoDB(AbstractDB):
 
     def _upsert(self, value: Dict[str, Any], key: str) -> bool:
         try:
-            self.collection.update_one({KEY_FIELD: key}, {"$set": value}, upsert=True)
+            self._writer("upsert")(value, key)
             return True
         except Exception as e:
             print(f"Upsert failed: {e}")
             return False
 
+    def _upsert_many(self, values: List[Dict[str, Any]], keys: List[str]) -> bool:
+        if not values:
+            return True
+        try:
+            # One round-trip for the whole batch; unordered so one failure doesn't stop the rest
+            self.collection.bulk_write(
+                [UpdateOne({KEY_FIELD: key}, {"$set": value}, upsert=True) for key, value in zip(keys, values)],
+                ordered=False,
+            )
+            return True
+        except BulkWriteError as e:
+            n_failed = len(e.details.get("writeErrors", []))
+            print(f"Upsert many partially failed: {n_failed}/{len(values)} documents not upserted")
+            return False
+        except Exception as e:
+            print(f"Upsert many failed: {e}")
+            return False
+
     def _delete(self, key: str) -> bool:
         try:
             result = self.collection.delete_one({KEY_FIELD: key})
@@ -123,13 +256,27 @@ class MongoDB(AbstractDB):
             return False
 
     def _delete_many(self, keys: List[str]) -> List[bool]:
-        results = []
-        for key in keys:
-            results.append(self._delete(key))
-        return results
+        keys = list(keys)
+        try:
+            existing = {
+                doc[KEY_FIELD]
+                for doc in self.collection.find(
+                    filter={KEY_FIELD: {"$in": keys}}, projection={KEY_FIELD: True, INBUILD_ID_FIELD: False}
+                )
+            }
+            self.collection.delete_many({KEY_FIELD: {"$in": keys}})
+            return [key in existing for key in keys]
+        except Exception as e:
+            print(f"Delete many failed: {e}")
+            return [False] * len(keys)
+
+    def _iter_query(
+        self, query: Dict[str, Any], projection: Dict[str, Any] | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        yield from self.collection.find(filter=query, projection=projection or DEFAULT_PROJECTION).batch_size(batch_size)
 
-    def _query(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
-        return list(self.collection.find(filter=query, projection={INBUILD_ID_FIELD: False}))
+    def _query(self, query: Dict[str, Any], projection: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+        return list(self._iter_query(query, projection=projection))
     
     def search(
         self, 
@@ -1,15 +1,102 @@
+import time
 import logging
-from typing import Any, Dict, Union
+import threading
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
 from datetime import datetime, timedelta, timezone
 
-from db import getDB
+import bson
+
+import db as database
 from helpers.time_utils import format_time_delta
 
+if not bson.has_c():
+    logging.warning("bson C extension is not available; cache reads and writes will use the slow pure-Python codec.")
+
+
+L1_MAXSIZE = 10_000
+"""Maximum number of entries kept in the in-process (L1) cache"""
+L1_TTL_SECONDS = 60
+"""How long an entry stays in the L1 cache before it is reloaded from the database"""
+EXPIRED_RETENTION_SECONDS = 3600 * 24 * 30
+"""How long MongoDB keeps an entry after `expires_at` before its TTL monitor deletes it"""
+
+@dataclass(slots=True, frozen=True)
+class CacheEntry:
+    """A cache envelope as kept in the L1 cache."""
+    raw: bytes
+    """The cached data, BSON-encoded so callers can't mutate the cached copy; see `CacheEntry.data`"""
+    expires_at: Optional[datetime]
+    """When the entry expires, None if it never does"""
+    l1_deadline: float
+    """`time.monotonic()` value after which the L1 copy must be reloaded"""
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """A fresh copy of the cached data, decoded (by the C extension) on every access"""
+        return bson.decode(self.raw)
+
+
+_L1: Dict[Tuple[str, str], CacheEntry] = {}
+_L1_LOCK = threading.RLock()
+_L1_GENERATION = 0
+"""Bumped by every invalidation; compared by `_l1_set` so a fetch that raced a write isn't cached"""
+_L1_INVALIDATED: Dict[Tuple[str, str], int] = {}
+"""(collection, key) -> generation of its last invalidation, oldest first, at most `L1_MAXSIZE` of them"""
+_L1_FORGOTTEN_GENERATION = 0
+"""The latest generation dropped from `_L1_INVALIDATED`"""
+
+
+def _l1_generation() -> int:
+    """The current generation, taken before a database fetch and passed to `_l1_set`"""
+    with _L1_LOCK:
+        return _L1_GENERATION
+
+
+def _l1_get(collection: str, key: str) -> Optional[CacheEntry]:
+    with _L1_LOCK:
+        entry = _L1.get((collection, key))
+        if entry is None:
+            return None
+        if entry.l1_deadline < time.monotonic():
+            _L1.pop((collection, key), None)
+            return None
+        return entry
+
+
+def _l1_set(collection: str, key: str, entry: CacheEntry, generation: int):
+    """Caches `entry` unless the key (or a forgotten key) was invalidated after `generation`"""
+    with _L1_LOCK:
+        if _L1_INVALIDATED.get((collection, key), 0) > generation or _L1_FORGOTTEN_GENERATION > generation:
+            # A save or delete landed while the entry was being fetched, so it may be stale
+            return
+        if len(_L1) >= L1_MAXSIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            _L1.pop(next(iter(_L1)), None)
+        _L1[(collection, key)] = entry
+
+
+def _l1_invalidate(collection: str, key: str):
+    global _L1_GENERATION, _L1_FORGOTTEN_GENERATION
+    with _L1_LOCK:
+        _L1.pop((collection, key), None)
+        _L1_GENERATION += 1
+        # Re-insert so the dict stays ordered by generation
+        _L1_INVALIDATED.pop((collection, key), None)
+        _L1_INVALIDATED[(collection, key)] = _L1_GENERATION
+        if len(_L1_INVALIDATED) > L1_MAXSIZE:
+            oldest = next(iter(_L1_INVALIDATED))
+            _L1_FORGOTTEN_GENERATION = _L1_INVALIDATED.pop(oldest)
+
 
 def load(key: str, collection: str, get_expired: bool = False) -> Union[Dict[str, Any], None]:
     """
     Load data from cache by key.
 
+    Recently loaded entries are served from an in-process cache for `L1_TTL_SECONDS`
+    before hitting the database again. Every call returns its own copy of the data.
+
     Args:
         key (str): The key to load from cache.
         collection (str): The name of the collection to load from.
@@ -18,15 +105,30 @@ def load(key: str, collection: str, get_expired: bool = False) -> Union[Dict[str
     Returns:
         The loaded data or None if not found in cache.
     """
-    data = getDB(collection).get(key=key)
-    d = data.get("data")
-    if not isinstance(d, dict):
-        return
+    entry = _l1_get(collection, key)
+    if entry is None:
+        generation = _l1_generation()
+        data = database.getDB(collection).get(key=key)
+        d = data.get("data")
+        if not isinstance(d, dict):
+            return
+        expires_at = data.get("expires_at")
+        if isinstance(expires_at, str):
+            # Entries written before expires_at was stored as a BSON datetime
+            expires_at = datetime.fromisoformat(expires_at)
+        if expires_at is not None and expires_at.tzinfo is None:
+            # BSON datetimes are UTC but decoded as naive
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        entry = CacheEntry(raw=bson.encode(d), expires_at=expires_at, l1_deadline=time.monotonic() + L1_TTL_SECONDS)
+        _l1_set(collection, key, entry, generation)
+    else:
+        # Every hit gets its own copy, so a caller mutating it doesn't change what later hits see
+        d = entry.data
+    expires_at = entry.expires_at
     
-    if get_expired or data.get("expires_at") is None:
+    if get_expired or expires_at is None:
         return d
     
-    expires_at = datetime.fromisoformat(data.get("expires_at", "1970-01-01T00:00:00+00:00"))
     current_ts = datetime.now(timezone.utc)
 
     left_to_expire = expires_at - current_ts
@@ -42,6 +144,9 @@ def save(key: str, collection: str, data: Dict[str, Any], expire_after_seconds:
     """
     Save data to cache by key.
 
+    `expires_at` is stored as a native datetime with a TTL index on it, so MongoDB purges
+    entries on its own `EXPIRED_RETENTION_SECONDS` after they expire.
+
     Args:
         key (str): The key to save to cache.
         expire_after_seconds (int, optional): The expiry time in seconds since cached time. Defaults to 3600 * 24 * 7 (1 week).
@@ -52,15 +157,52 @@ def save(key: str, collection: str, data: Dict[str, Any], expire_after_seconds:
     if expire_after_seconds is None:
         expires_at = None
     else:
-        expires_at = (datetime.now(timezone.utc) + timedelta(seconds=expire_after_seconds)).isoformat()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=expire_after_seconds)
     
     value = {"data": data, "expires_at": expires_at}
-    getDB(collection).upsert(key=key, value=value)
+    db = database.getDB(collection)
+    db.create_index("expires_at", expireAfterSeconds=EXPIRED_RETENTION_SECONDS)
+    db.upsert(key=key, value=value)
+    _l1_invalidate(collection, key)
     logging.info(
         f"Cache entry SAVED in {collection!r} for key {key!r}. "
         + ("Never expires!" if expire_after_seconds is None else f"Expires in {format_time_delta(timedelta(seconds=expire_after_seconds))}")
     )
 
+def save_many(pairs: Iterable[Tuple[str, Dict[str, Any]]], collection: str, expire_after_seconds: int | None = 3600 * 24 * 7):
+    """
+    Save many entries to cache in a single database round-trip.
+
+    Args:
+        pairs (Iterable[Tuple[str, Dict[str, Any]]]): The (key, data) pairs to save.
+        collection (str): The name of the collection to save to.
+        expire_after_seconds (int, optional): The expiry time in seconds since cached time. Defaults to 3600 * 24 * 7 (1 week).
+            If None, the objects will never expire.
+
+    Returns:
+        bool: True if every entry was saved.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return True
+    if expire_after_seconds is None:
+        expires_at = None
+    else:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=expire_after_seconds)
+
+    keys = [key for key, _ in pairs]
+    values = [{"data": data, "expires_at": expires_at} for _, data in pairs]
+    db = database.getDB(collection)
+    db.create_index("expires_at", expireAfterSeconds=EXPIRED_RETENTION_SECONDS)
+    _bool = db.upsert_many(values=values, keys=keys)
+    for key in keys:
+        _l1_invalidate(collection, key)
+    if _bool:
+        logging.info(f"Cache SAVED {len(keys)} entries in {collection!r}.")
+    else:
+        logging.warning(f"Cache save of {len(keys)} entries in {collection!r} FAILED for some or all of them.")
+    return _bool
+
 def delete(key: str, collection: str):
     """
     Delete data from cache by key.
@@ -73,13 +215,22 @@ def delete(key: str, collection: str):
     Returns:
         bool: True if deleted, False if not found.
     """
-    _bool = getDB(collection).delete(key=key)
+    _bool = database.getDB(collection).delete(key=key)
+    _l1_invalidate(collection, key)
     if _bool:
         logging.info(f"Cache entry DELETED in {collection!r} for key {key!r}")
     else:
         logging.warning(f"Cache entry NOT FOUND in {collection!r} for key {key!r}. Could NOT DELETE.")
     return _bool
 
+@lru_cache(maxsize=256)
+def _query_rewriter(keys: frozenset) -> Callable[[dict], dict]:
+    """Builds (once per query shape) a function that prefixes the query's keys with `data.`"""
+    mapping = {k: (f"data.{k}" if isinstance(k, str) else k) for k in keys}
+    def apply(q: dict) -> dict:
+        return {mapping[k]: v for k, v in q.items()}
+    return apply
+
 def query(query: dict, collection: str):
     """
     Query the cache for the given query dict and return a list data.
@@ -92,11 +243,8 @@ def query(query: dict, collection: str):
     Returns:
         List[Dict[str, Any]]: A list of data that match the query.
     """
-    query = {
-        (f"data.{k}" if isinstance(k, str) else k): v 
-        for k, v in query.items()
-    }
-    documents = getDB(collection).query(query=query)
+    query = _query_rewriter(frozenset(query))(query)
+    documents = database.getDB(collection).query(query=query, projection={"data": True, "_id": False})
     if documents:
         logging.info(f"Cache query returned {len(documents)} results for query {query} in {collection!r}.")
     else:
@@ -1,28 +1,119 @@
-from typing import Dict, List
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from types import MappingProxyType
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import httpx
 import openai
+import orjson
 from config import API_KEY
+from helpers import cache_utils as cas
+
+CACHE_COLLECTION = "openai_cache"
+"""The cache collection holding previous OpenAI responses"""
+CACHE_EXPIRE_AFTER_SECONDS = 3600 * 24 * 7
+
+MAX_RETRIES = 3
+"""Retries (with exponential backoff and jitter, done by the SDK) on connection errors, 429s and 5xx"""
+REQUEST_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=100)
+
+SYSTEM_MSG = MappingProxyType({"role": "system", "content": "You are a Senior Software architect..."})
+"""The system message sent ahead of our prompts, read-only so it stays byte-identical between calls (and cacheable by OpenAI)"""
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+_background_loop: asyncio.AbstractEventLoop | None = None
+_background_loop_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_client() -> openai.OpenAI:
+    """
+    Returns the shared OpenAI client, created on first use.
+
+    The client keeps HTTP/2 connections alive in a bounded pool, so repeated calls
+    reuse them instead of paying for a new TLS handshake each time.
+    """
+    return openai.OpenAI(
+        api_key=API_KEY,
+        max_retries=MAX_RETRIES,
+        timeout=REQUEST_TIMEOUT,
+        http_client=httpx.Client(http2=True, limits=POOL_LIMITS, timeout=REQUEST_TIMEOUT),
+    )
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """
+    Returns the AsyncOpenAI client for the running event loop.
+
+    One client is kept per event loop, since async HTTP connections are bound to
+    the loop they were opened on.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = openai.AsyncOpenAI(
+            api_key=API_KEY,
+            max_retries=MAX_RETRIES,
+            timeout=REQUEST_TIMEOUT,
+            http_client=httpx.AsyncClient(http2=True, limits=POOL_LIMITS, timeout=REQUEST_TIMEOUT),
+        )
+    return client
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the event loop that synchronous callers run their async requests on, started on first use.
+
+    The loop runs forever in a daemon thread, so its AsyncOpenAI client (and the client's
+    open connections) is shared by every `call_openai_many` call.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="openai-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
 
-openai.api_key = API_KEY
+def _cache_key(**params: Any) -> str:
+    """Stable hash of the request parameters, used as the response cache key."""
+    raw = orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
 
 
-def get_chatgpt_response(prompt, model="gpt-3.5-turbo-16k", temperature=0.2, max_tokens=9000, n=1, seed: int = None):
+def get_chatgpt_response(prompt, model="gpt-3.5-turbo-16k", temperature=0.2, max_tokens=9000, n=1, seed: int = None, use_cache: bool = True):
     """
     Generates a response from ChatGPT based on the given prompt.
 
     Args:
         prompt (str): The input prompt to guide the ChatGPT response.
         model (str, optional): The model ID for ChatGPT. Defaults to "gpt-3.5-turbo-16k".
-        temperature (float, optional): The randomness level in the response generation. 
+        temperature (float, optional): The randomness level in the response generation.
                                        Higher values yield more random responses. Defaults to 0.2.
         max_tokens (int, optional): The maximum number of tokens to generate in the response. Defaults to 9000.
         n (int, optional): The number of responses to generate. Defaults to 1.
+        seed (int, optional): The seed for sampling. Defaults to None.
+        use_cache (bool, optional): Whether to reuse a cached response for identical parameters. Defaults to True.
 
     Returns:
         str: The generated response from ChatGPT. Returns an empty string if no content is generated.
     """
-    messages = [{"role": "system", "content": "You are a Senior Software architect..."}, {"role": "user", "content": prompt}]
+    messages = [dict(SYSTEM_MSG), {"role": "user", "content": prompt}]
 
-    response = openai.ChatCompletion.create(
+    if use_cache:
+        key = _cache_key(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, n=n, seed=seed)
+        cached = cas.load(key, CACHE_COLLECTION)
+        if cached is not None:
+            return cached["resp"]
+
+    response = get_client().chat.completions.create(
         model=model,
         messages=messages,
         temperature=temperature,
@@ -31,17 +122,100 @@ def get_chatgpt_response(prompt, model="gpt-3.5-turbo-16k", temperature=0.2, max
         stop=None,
         seed=seed,
     )
-    generated_response = response['choices'][0]['message']['content'].strip()
+    generated_response = (response.choices[0].message.content or '').strip()
+    if use_cache:
+        cas.save(key, CACHE_COLLECTION, {"resp": generated_response}, expire_after_seconds=CACHE_EXPIRE_AFTER_SECONDS)
     return generated_response if generated_response else ''
 
 
-def call_openai(messages: List[Dict[str, str]], model="gpt-3.5-turbo-16k", temperature=0.2, n=1, *args, **kwargs) -> List[str]:
-    response = openai.ChatCompletion.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        n=n,
-        *args, 
-        **kwargs, 
+def call_openai(
+    messages: List[Dict[str, str]], model="gpt-3.5-turbo-16k", temperature=0.2, n=1, use_cache: bool = True, parallel: bool = False, **kwargs
+) -> List[str]:
+    """
+    Calls OpenAI chat completions and returns the content of every choice.
+
+    When `use_cache` is True, responses are cached by a hash of the model, messages,
+    temperature, n and any extra arguments, so repeated calls skip the request.
+
+    When `parallel` is True and `n` > 1, the `n` choices are requested as `n` concurrent
+    single-choice requests, so the latency is that of the slowest one instead of one
+    long generation of all of them. Failed requests are logged and dropped (and the
+    partial result is not cached); the call only raises if every request failed.
+    """
+    if use_cache:
+        key = _cache_key(model=model, messages=messages, temperature=temperature, n=n, **kwargs)
+        cached = cas.load(key, CACHE_COLLECTION)
+        if cached is not None:
+            return cached["resp"]
+
+    if parallel and n > 1:
+        responses = call_openai_many(
+            [messages] * n, model=model, temperature=temperature, n=1, return_exceptions=True, **kwargs
+        )
+        errors = [resp for resp in responses if isinstance(resp, BaseException)]
+        if len(errors) == len(responses):
+            raise errors[0]
+        for e in errors:
+            logging.warning(f"Dropping a failed OpenAI request ({len(errors)}/{n} failed): {e!r}")
+        result = [resp for choices in responses if not isinstance(choices, BaseException) for resp in choices]
+        use_cache = use_cache and not errors
+    else:
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            n=n,
+            **kwargs,
+        )
+        result = [(x.message.content or '').strip() for x in response.choices]
+    if use_cache:
+        cas.save(key, CACHE_COLLECTION, {"resp": result}, expire_after_seconds=CACHE_EXPIRE_AFTER_SECONDS)
+    return result
+
+
+async def call_openai_async(
+    messages_batch: List[List[Dict[str, str]]], model="gpt-3.5-turbo-16k", temperature=0.2, n=1,
+    return_exceptions: bool = False, **kwargs
+) -> List[List[str] | BaseException]:
+    """
+    Sends every conversation in `messages_batch` to OpenAI concurrently.
+
+    Args:
+        messages_batch (List[List[Dict[str, str]]]): The conversations to send, one request each.
+        model (str, optional): The model ID. Defaults to "gpt-3.5-turbo-16k".
+        temperature (float, optional): The sampling temperature. Defaults to 0.2.
+        n (int, optional): The number of responses to generate per conversation. Defaults to 1.
+        return_exceptions (bool, optional): If True, a failed request puts its exception in the result
+            instead of failing the whole batch. Defaults to False.
+        **kwargs: Extra arguments passed to `chat.completions.create`.
+
+    Returns:
+        List[List[str] | BaseException]: The responses (or, with `return_exceptions`, the exception)
+            for each conversation, in the same order as `messages_batch`.
+    """
+    client = get_async_client()
+    responses = await asyncio.gather(*[
+        client.chat.completions.create(model=model, messages=messages, temperature=temperature, n=n, **kwargs)
+        for messages in messages_batch
+    ], return_exceptions=return_exceptions)
+    return [
+        response if isinstance(response, BaseException)
+        else [(x.message.content or '').strip() for x in response.choices]
+        for response in responses
+    ]
+
+
+def call_openai_many(
+    messages_batch: List[List[Dict[str, str]]], model="gpt-3.5-turbo-16k", temperature=0.2, n=1,
+    return_exceptions: bool = False, **kwargs
+) -> List[List[str] | BaseException]:
+    """
+    Blocking wrapper around `call_openai_async` for synchronous callers.
+
+    The requests run on the background loop (see `get_background_loop`), so every call
+    reuses the same AsyncOpenAI client and its connections.
+    """
+    coro = call_openai_async(
+        messages_batch, model=model, temperature=temperature, n=n, return_exceptions=return_exceptions, **kwargs
     )
-    return [x['message']['content'].strip() for x in response['choices']]
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result()
@@ -1,33 +1,97 @@
-from markitdown import MarkItDown
+import os
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
 
+from helpers.utils import get_file_hash
+
+TEXT_CACHE_MAXSIZE = 32
+"""Maximum number of extracted documents kept in memory by `read`"""
+
+_TEXT_CACHE: Dict[Tuple[str, str], str] = {}
+_TEXT_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _markitdown():
+    # Imported on first use, so reading a PDF or text file doesn't pay for markitdown's converters
+    from markitdown import MarkItDown
+    return MarkItDown()
+
+def _md_convert(file_path: str) -> str:
+    return _markitdown().convert(file_path).text_content
+
+def _read_pdf(file_path: str) -> str:
+    # PyMuPDF extracts text in C (MuPDF), much faster than markitdown's pdfminer backend
+    import pymupdf
+
+    with pymupdf.open(file_path) as doc:
+        return "\n".join(page.get_text("text") for page in doc)
+
+def _read_plain(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+_DISPATCH: Dict[str, Callable[[str], str]] = {
+    ".pdf": _read_pdf,
+    ".docx": _md_convert,
+    ".xlsx": _md_convert,
+    ".mp3": _md_convert,
+    ".wav": _md_convert,
+    ".txt": _read_plain,
+    ".md": _read_plain,
+}
+"""Maps a lowercase file extension to the function that reads it"""
+
+
+def get_extension(file_path: str) -> str:
+    """Returns the lowercase extension of `file_path`, including the leading dot."""
+    return os.path.splitext(file_path)[1].lower()
+
+def read(file_path: str) -> str:
+    """
+    Read a supported file and return its text content, dispatching on the file extension.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+    """
+    ext = get_extension(file_path)
+    fn = _DISPATCH.get(ext)
+    if fn is None:
+        raise ValueError(f"Unsupported file format: {file_path!r}")
+    # Keyed by content, since every upload lands in a fresh temp file: re-reading the
+    # same document costs a hash instead of a full parse
+    key = (get_file_hash(file_path), ext)
+    with _TEXT_CACHE_LOCK:
+        text = _TEXT_CACHE.get(key)
+    if text is None:
+        text = fn(file_path)
+        with _TEXT_CACHE_LOCK:
+            if len(_TEXT_CACHE) >= TEXT_CACHE_MAXSIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                _TEXT_CACHE.pop(next(iter(_TEXT_CACHE)), None)
+            _TEXT_CACHE[key] = text
+    return text
+
+def _read_as(file_path: str, extensions: tuple[str, ...], error: str) -> str:
+    if get_extension(file_path) not in extensions:
+        raise ValueError(error)
+    return _DISPATCH[get_extension(file_path)](file_path)
 
 def read_pdf(file_path: str):
-    if not file_path.endswith('.pdf'):
-        raise ValueError("File is not a PDF")
-    return MarkItDown().convert(file_path).text_content
+    return _read_as(file_path, (".pdf",), "File is not a PDF")
 
 def read_docx(file_path: str):
-    if not file_path.endswith('.docx'):
-        raise ValueError("File is not a DOCX")
-    return MarkItDown().convert(file_path).text_content
+    return _read_as(file_path, (".docx",), "File is not a DOCX")
 
 def read_excel(file_path: str):
-    if not file_path.endswith('.xlsx'):
-        raise ValueError("File is not an Excel file")
-    return MarkItDown().convert(file_path).text_content
+    return _read_as(file_path, (".xlsx",), "File is not an Excel file")
 
 def read_mp3(file_path: str):
-    if not file_path.endswith('.mp3'):
-        raise ValueError("File is not an MP3")
-    return MarkItDown().convert(file_path).text_content
+    return _read_as(file_path, (".mp3",), "File is not an MP3")
 
 def read_wav(file_path: str):
-    if not file_path.endswith('.wav'):
-        raise ValueError("File is not an WAV")
-    return MarkItDown().convert(file_path).text_content
+    return _read_as(file_path, (".wav",), "File is not an WAV")
 
 def read_text(file_path: str):
-    if file_path.split(".")[-1] not in ["txt", "md"]:
-        raise ValueError("File is not a text file")
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.read()
+    return _read_as(file_path, (".txt", ".md"), "File is not a text file")
@@ -1,6 +1,37 @@
+import os
 import re
 import logging
-from typing import Any, Callable, Dict, List
+from pathlib import Path
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+_CLEAN_RE = re.compile(
+    "(?:"
+    r"[^\w\s@.-]"  # Non-alphanumeric characters except @, . and - (bullet points included)
+    "|["
+    "\U0001F000-\U0001FFFF"  # Supplementary Multilingual Plane symbol blocks (emojis, pictographs, ...)
+    "\u2600-\u27BF"  # Miscellaneous Symbols, Dingbats
+    "\u2B00-\u2BFF"  # Miscellaneous Symbols and Arrows
+    "\uFE0F"  # Emoji presentation selector
+    "\u200D"  # Zero-width joiner, so ZWJ sequences go as a whole
+    "]"
+    r"|\s"
+    ")+",
+    flags=re.UNICODE,
+)
+"""Runs of characters to drop, mixed with whitespace; see `_clean_repl`"""
+
+_HAS_WS_RE = re.compile(r"\s")
+
+def _clean_repl(m: re.Match) -> str:
+    # A run containing whitespace collapses to one space, otherwise it is removed
+    return " " if _HAS_WS_RE.search(m.group()) else ""
+
+_STRIP_TABLE = str.maketrans("", "", "•\u200b\ufeff")
+"""Single characters deleted up front with `str.translate` (bullets, zero-width space, BOM)"""
+_KEY_RE = re.compile(r"\{(\w+?)\}")
+_WORD_SPLIT_RE = re.compile(r"\W+")
+_SLUG_RE = re.compile(r"[^\w\s-]+")
 
 
 def clean_text(text: str):
@@ -12,8 +43,9 @@ def clean_text(text: str):
     - Removes bullet points and special characters, keeping only alphanumeric
       characters, spaces, '@', and '.'.
     - Eliminates emojis and other pictographic symbols using a predefined regex pattern.
-    - Collapses multiple newlines into a single newline.
-    - Replaces multiple spaces with a single space.
+    - Replaces runs of whitespace (newlines included) with a single space.
+
+    All of the above is done in a single regex scan.
 
     Args:
         text (str): The text to be cleaned.
@@ -21,38 +53,12 @@ def clean_text(text: str):
     Returns:
         str: The cleaned text, free of unwanted characters and normalized for consistent spacing.
     """
-    # Remove leading and trailing whitespace
-    text = text.strip()
-
-    # Remove bullet points and special characters
-    text = re.sub(r"•", "", text)  # Replace bullet points with an empty string
-    text = re.sub(
-        r"[^\w\s@.-]", "", text
-    )  # Remove non-alphanumeric characters except @ and .
-
-    # Remove emojis using regex (you may need to expand this list)
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # Emojis
-        "\U0001F300-\U0001F5FF"  # Symbols & Pictographs
-        "\U0001F680-\U0001F6FF"  # Transport & Map Symbols
-        "\U0001F700-\U0001F77F"  # Alchemical Symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2"  # Enclosed Alphanumeric Supplement
-        "]+",
-        flags=re.UNICODE,
-    )
-    text = emoji_pattern.sub(r"", text)
-    # text = text.lower()
-
-    # Testing cleanup
-    text = re.sub(r"\n+", "\n", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    # Bullet points and zero-width characters are the most common strips, so drop them
+    # with a C-level table lookup instead of a regex callback per occurrence
+    # Then remove special characters and emojis, and collapse whitespace, in a single scan
+    # (you may need to expand the emoji list)
+    text = text.translate(_STRIP_TABLE)
+    text = _CLEAN_RE.sub(_clean_repl, text.strip()).strip()
     return text
 
 
@@ -68,7 +74,13 @@ def get_replacement_keys(text: str) -> List[str]:
         >>> get_replacement_keys(text)
         ['name1', 'name2']
     """
-    return re.findall(r"\{(\w+?)\}", text)
+    return _KEY_RE.findall(text)
+
+
+@lru_cache(maxsize=256)
+def _compile_alternation(keys: Tuple[str, ...]) -> re.Pattern:
+    # Longest keys first, so a key that is a prefix of another doesn't win the match
+    return re.compile("|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True)))
 
 
 def text_replacer(text: str, replacements: dict[str, Any], curly_braces: bool = True):
@@ -94,14 +106,23 @@ def text_replacer(text: str, replacements: dict[str, Any], curly_braces: bool =
         >>> text_replacer(text, replacements, curly_braces=False)
         "Hello, John! My name is Smith!"
     """
-    replacement_keys = set(get_replacement_keys(text))
-    if replacement_keys - set(replacements):
-        logging.warning(f"Keys not found in replacement: {replacement_keys - set(replacements)}")
-    for key, value in replacements.items():
-        if curly_braces:
-            key = f"{{{key}}}"
-        text = text.replace(key, str(value))
-    return text
+    # `{word}` placeholders left without a replacement are reported; keys themselves may
+    # contain any characters, since they are matched literally below
+    missing = set(get_replacement_keys(text)) - set(replacements)
+    if missing:
+        logging.warning(f"Keys not found in replacement: {missing}")
+    if not replacements:
+        # Nothing to substitute, so skip the substitution pass
+        return text
+    if curly_braces:
+        pattern = _compile_alternation(tuple(sorted(f"{{{key}}}" for key in replacements)))
+        return pattern.sub(lambda m: str(replacements[m.group(0)[1:-1]]), text)
+    pattern = _compile_alternation(tuple(sorted(replacements)))
+    return pattern.sub(lambda m: str(replacements[m.group(0)]), text)
+
+
+_PROMPT_CACHE: Dict[str, Tuple[int, str]] = {}
+"""File path -> (mtime in ns, contents) of files read by `file_read_and_replacer`"""
 
 
 def file_read_and_replacer(
@@ -110,19 +131,26 @@ def file_read_and_replacer(
     """
     Read a file and replace all keys in it with their corresponding values
 
+    The file contents are cached until its modification time changes.
+
     Args:
         file_path (str): The file path
         replacements (dict[str, Any]): The replacements
         curly_braces (bool, optional): Whether to use curly braces or not
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        text: str = f.read()
+    mtime = os.stat(file_path).st_mtime_ns
+    cached = _PROMPT_CACHE.get(file_path)
+    if cached is not None and cached[0] == mtime:
+        text = cached[1]
+    else:
+        text = Path(file_path).read_text(encoding="utf-8")
+        _PROMPT_CACHE[file_path] = (mtime, text)
     return text_replacer(text, replacements, curly_braces)
 
 
 def read_prompt(
     prompt_name: str,
-    replacements: dict[str, Any] = {},
+    replacements: dict[str, Any] | None = None,
     directory: str = "prompts",
     extension: str = ".txt",
 ) -> str:
@@ -136,7 +164,7 @@ def read_prompt(
     Args:
         prompt_name (str): The name of the prompt file (without extension) to read.
         replacements (dict[str, Any], optional): A dictionary of replacements to apply
-            to placeholders in the prompt file. Defaults to an empty dictionary.
+            to placeholders in the prompt file. Defaults to None, which applies none.
         directory (str, optional): The directory where the prompt files are located.
             Defaults to "prompts".
         extension (str, optional): The file extension of the prompt files. Defaults to ".txt".
@@ -144,7 +172,7 @@ def read_prompt(
     Returns:
         str: The content of the prompt file with the specified replacements applied.
     """
-    return file_read_and_replacer(f"{directory}/{prompt_name}{extension}", replacements)
+    return file_read_and_replacer(f"{directory}/{prompt_name}{extension}", replacements or {})
 
 
 def the_words_intersect(text1: str, text2: str):
@@ -152,9 +180,9 @@ def the_words_intersect(text1: str, text2: str):
     Determine if there are common words between two strings.
 
     This function converts both input strings to lowercase and splits them 
-    into words using non-word characters as delimiters. It then creates sets 
-    of words from these strings and checks for any intersection between the 
-    two sets, indicating shared words.
+    into words using non-word characters as delimiters. It then creates a set 
+    of words from the shorter string and checks whether any word of the other 
+    string is in it, stopping at the first shared word.
 
     Args:
         text1 (str): The first input string.
@@ -163,9 +191,11 @@ def the_words_intersect(text1: str, text2: str):
     Returns:
         bool: True if there is at least one common word, otherwise False.
     """
-    words_set1 = set(re.split(r"\W+", text1.lower()))
-    words_set2 = set(re.split(r"\W+", text2.lower()))
-    return bool(words_set1.intersection(words_set2))
+    if len(text1) > len(text2):
+        # Only the smaller text is turned into a set
+        text1, text2 = text2, text1
+    words_set1 = set(_WORD_SPLIT_RE.split(text1.lower()))
+    return any(word in words_set1 for word in _WORD_SPLIT_RE.split(text2.lower()))
 
 def remove_unnecessary_text(text: str, unnecessary_texts: List[str]) -> str:
     """
@@ -185,13 +215,18 @@ def remove_unnecessary_text(text: str, unnecessary_texts: List[str]) -> str:
         text = text.replace(text_to_remove, "")
     return text
 
+@lru_cache(maxsize=256)
+def _compile_filter(keywords: Tuple[str, ...]) -> re.Pattern:
+    return re.compile("|".join(keywords), re.IGNORECASE)
+
 def filter_by_keywords(texts: List[str], keywords: List[str]) -> List[str]:
     """
     Filters a collection of text entries to find those containing any of the specified keywords.
 
     This function performs a case-insensitive search using regular expressions to match 
     the keywords within the text entries. The keywords can be complex patterns, allowing 
-    for flexible filtering criteria.
+    for flexible filtering criteria. Each text is searched on its own, stopping at the
+    first keyword hit.
 
     Args:
         texts (List[str]): A list of text strings to be filtered.
@@ -200,9 +235,10 @@ def filter_by_keywords(texts: List[str], keywords: List[str]) -> List[str]:
     Returns:
         List[str]: A list of text entries that contain any of the specified keywords.
     """
-    pattern = re.compile(f'(.*(?:{"|".join(keywords)}).*)', re.IGNORECASE)
-    return pattern.findall('\n'.join(texts))
+    pattern = _compile_filter(tuple(keywords))
+    return [text for text in texts if pattern.search(text)]
 
+@lru_cache(maxsize=256)
 def snake_to_title(snake_str: str) -> str:
     """
     Converts a snake_case string to title case.
@@ -237,10 +273,17 @@ def dict_to_context(
     Returns:
         str: The string representation of the dictionary in context format.
     """
-    return "\n\n".join(
-        f"{key_prefix}{key_converter(key)}\n```\n{value}\n```"
-        for key, value in dict.items()
-    )
+    parts: List[str] = []
+    append = parts.append
+    for key, value in dict.items():
+        if parts:
+            append("\n\n")
+        append(key_prefix)
+        append(key_converter(key))
+        append("\n```\n")
+        append(value if isinstance(value, str) else str(value))
+        append("\n```")
+    return "".join(parts)
 
 def slugify(text: str, replace_specials_with: str = "_", replace_spaces_with: str = "-") -> str:
-    return re.sub(r'[^\w\s-]+', replace_specials_with, text).strip().lower().replace(' ', '-')
+    return _SLUG_RE.sub(replace_specials_with, text).strip().lower().replace(' ', '-')
@@ -1,9 +1,12 @@
-import re
 import random
-from copy import deepcopy
+from functools import lru_cache
 from typing import List, Union
 from datetime import date, datetime, timedelta, timezone
 
+_UID_FORMAT = "%Y%m%d%H%M%S%f0000"
+"""The digits of a UTC ISO timestamp, with the `+00:00` offset as a trailing `0000`"""
+_RAND_LO, _RAND_HI = 10 ** 11, 10 ** 12
+
 
 def humanize_datetime(dt: datetime) -> str:
     """
@@ -58,10 +61,9 @@ def get_timestamp_uid(make_uuid=True):
         - The probability of two keys generated at the exact same microsecond having the same random number is 1 in 1 trillion (0.000000000001).
         - This makes the likelihood of a conflicting key extremely low.
     """
-    timestamp = datetime.now(timezone.utc).isoformat()
-    uid: str = re.sub(r'[:\.\-\+TZ\s]', '', timestamp)
+    uid: str = datetime.now(timezone.utc).strftime(_UID_FORMAT)
     if make_uuid:
-        rndm = str(random.randrange(10 ** 11, 10 ** 12))
+        rndm = f"{random.randrange(_RAND_LO, _RAND_HI)}"
         uid = f'{uid[:8]}-{uid[8:12]}-{uid[12:16]}-{uid[16:20]}-{rndm}'
     return uid
 
@@ -80,6 +82,25 @@ def get_delta_day_hr_min_sec(td: timedelta):
     days, hours = divmod(hours, 24)
     return days, hours, minutes, seconds
 
+_UNIT_SINGULAR = {"d": "day", "h": "hour", "m": "minute", "s": "second"}
+_UNIT_PLURAL = {k: v + "s" for k, v in _UNIT_SINGULAR.items()}
+
+def _make_str(n: int, _type: str):
+    """
+    Construct a string from a number and a unit type.
+
+    Args:
+        n (int): The number to be used in the string.
+        _type (str): The type of unit, as a single character.
+            Possible values: 'd' for day, 'h' for hour, 'm' for minute, 's' for second.
+
+    Returns:
+        str: A string in the format "<n> <unit>{s}", where <n> is the given number,
+            <unit> is the unit name based on `_type`, and {s} is the plural form suffix
+            if the number is not 1.
+    """
+    return f"{int(n)} {(_UNIT_SINGULAR if n == 1 else _UNIT_PLURAL)[_type]}"
+
 def format_time_delta(td: timedelta = timedelta(seconds=0), pre: str = '', post: str = ''):
     """
     Format a timedelta into a string showing the most relevant parts.
@@ -102,24 +123,7 @@ def format_time_delta(td: timedelta = timedelta(seconds=0), pre: str = '', post:
         "0 seconds"
     """
     day, hr, min, sec = get_delta_day_hr_min_sec(td)
-    
-    def _make_str(n: int, _type: str):
-        """
-        Construct a string from a number and a unit type.
-
-        Args:
-            n (int): The number to be used in the string.
-            _type (str): The type of unit, as a single character.
-                Possible values: 'd' for day, 'h' for hour, 'm' for minute, 's' for second.
-
-        Returns:
-            str: A string in the format "<n> <unit>{s}", where <n> is the given number,
-                <unit> is the unit name based on `_type`, and {s} is the plural form suffix
-                if the number is not 1.
-        """
-        _map = {"d": "day", "h": "hour", "m": "minute", "s": "second"}
-        return f"{int(n)} {_map[_type]}{(('', 's')[n!=1])}"
-    
+
     messages: List[str] = []
     
     if day:
@@ -133,6 +137,48 @@ def format_time_delta(td: timedelta = timedelta(seconds=0), pre: str = '', post:
 
     return f"{pre}{', '.join(messages)}{post}"
 
+def _to_int(x) -> int:
+    # Structured JSON usually already has ints, so skip the int() call for them
+    return x if type(x) is int else int(x)
+
+_VECTORIZE_MIN_ROWS = 64
+"""Above this many rows, `format_dmy_in_list_of_dicts` does the date math with NumPy"""
+
+@lru_cache(maxsize=1024)
+def _format_day_delta(days: int) -> str:
+    td = timedelta(days=days)
+    if days > 0:
+        return format_time_delta(abs(td), post=" ago")
+    return format_time_delta(td, pre="in ")
+
+def _day_deltas(ref_date: date, dvs: list[dict], year_key: str, month_key: str, day_key: str) -> list[int]:
+    """
+    Days from each date in `dvs` to `ref_date`, computed as NumPy datetime64 arithmetic.
+
+    Raises:
+        ValueError: If any year, month or day is out of range, as `date()` would.
+    """
+    # Imported here so the row-by-row path doesn't pay for importing numpy
+    import numpy as np
+
+    n = len(dvs)
+    years = np.fromiter((_to_int(dv[year_key]) for dv in dvs), dtype=np.int64, count=n)
+    months = np.fromiter((_to_int(dv[month_key]) for dv in dvs), dtype=np.int64, count=n)
+    days = np.fromiter((_to_int(dv[day_key]) for dv in dvs), dtype=np.int64, count=n)
+    if ((years < 1) | (years > 9999)).any():
+        raise ValueError("year is out of range")
+    if ((months < 1) | (months > 12)).any():
+        raise ValueError("month must be in 1..12")
+
+    month_start = (years - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (months - 1).astype("timedelta64[M]")
+    month_start_day = month_start.astype("datetime64[D]")
+    month_len = ((month_start + np.timedelta64(1, "M")).astype("datetime64[D]") - month_start_day).astype(np.int64)
+    if ((days < 1) | (days > month_len)).any():
+        raise ValueError("day is out of range for month")
+
+    dates = month_start_day + (days - 1).astype("timedelta64[D]")
+    return (np.datetime64(ref_date, "D") - dates).astype(np.int64).tolist()
+
 def format_dmy_in_list_of_dicts(
     data: list[dict],
     field_name: str,
@@ -148,7 +194,8 @@ def format_dmy_in_list_of_dicts(
 
     This function processes a list within a dictionary, converting date components 
     (year, month, day) into a formatted date string. If `format_to_delta` is True, 
-    the date is formatted as a time delta from the `delta_date`.
+    the date is formatted as a time delta from the `delta_date`. For long lists, the
+    deltas are computed in one vectorized NumPy pass.
 
     Args:
         data (list[dict]): The source data containing lists of dictionaries.
@@ -163,9 +210,24 @@ def format_dmy_in_list_of_dicts(
     Returns:
         list[dict]: The modified data with formatted date strings.
     """
-    # Create a deep copy to avoid mutating the original data
-    data = deepcopy(data)
-    lst = data[field_name]
+    # Copy only the containers that are written to, to avoid mutating the original data
+    lst = [dict(d) for d in data[field_name]]
+    data = {**data, field_name: lst}
+
+    ref_date = None
+    if format_to_delta:
+        # Determine the reference date for delta calculation, once for all rows
+        ref_date = date.today() if delta_date is None else (
+            delta_date if isinstance(delta_date, date) else date.fromisoformat(delta_date)
+        )
+
+        # Long lists: compute all day deltas in one NumPy pass instead of per row
+        rows = [d for d in lst if isinstance(d[dmy_key], dict)]
+        if len(rows) > _VECTORIZE_MIN_ROWS:
+            deltas = _day_deltas(ref_date, [d[dmy_key] for d in rows], year_key, month_key, day_key)
+            for d, days in zip(rows, deltas):
+                d[dmy_key] = _format_day_delta(days)
+            return data
     
     for d in lst:
         dv = d[dmy_key]
@@ -175,23 +237,12 @@ def format_dmy_in_list_of_dicts(
         
         # Construct a date object from the year, month, and day components
         dt = date(
-            year=int(dv[year_key]), month=int(dv[month_key]), day=int(dv[day_key])
+            year=_to_int(dv[year_key]), month=_to_int(dv[month_key]), day=_to_int(dv[day_key])
         )
         
         if format_to_delta:
-            # Determine the reference date for delta calculation
-            delta_date = date.today() if delta_date is None else (
-                delta_date if isinstance(delta_date, date) else date.fromisoformat(delta_date)
-            )
-            
-            # Calculate the timedelta between the reference date and the constructed date
-            td = delta_date - dt
-            
-            # Format the timedelta as a human-readable string
-            if td.days > 0:
-                d[dmy_key] = format_time_delta(abs(td), post=" ago")
-            else:
-                d[dmy_key] = format_time_delta(td, pre="in ")
+            # Format the days between the reference date and the constructed date as a human-readable string
+            d[dmy_key] = _format_day_delta((ref_date - dt).days)
         else:
             # Format the date as an ISO8601 string
             d[dmy_key] = dt.isoformat()
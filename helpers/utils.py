@@ -1,11 +1,16 @@
+import os
 import re
 import uuid
+import asyncio
 import hashlib
 import logging
+import itertools
 import threading
 import traceback
+import contextlib
 import multiprocessing
 import concurrent.futures
+from functools import lru_cache
 from typing import (
     Any,
     List,
@@ -13,25 +18,42 @@ from typing import (
     Literal,
     Callable,
     Iterable,
+    Awaitable,
     NamedTuple,
     MutableMapping,
 )
 
-from fuzzywuzzy import process
+from rapidfuzz import fuzz, process, utils as fuzz_utils
 
 
-def run_in_background(func, *args, **kwargs):
+_BG_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 5), thread_name_prefix="bg"
+)
+"""Shared worker threads for `run_in_background`"""
+
+def _log_background_error(future: concurrent.futures.Future):
+    exc = future.exception()
+    if exc is not None:
+        logging.error(f"Got error while running in background: \n{get_trace(exc, 3)}")
+
+def run_in_background(func, *args, **kwargs) -> concurrent.futures.Future:
     """
     Run a function in the background.
 
+    The function runs on a shared, bounded pool of worker threads, so no new thread is
+    started per call. Exceptions raised by the function are logged.
+
     Args:
         func (function): The function to run in the background.
         *args: Variable number of arguments to pass to the function.
         **kwargs: Keyword arguments to pass to the function.
+
+    Returns:
+        concurrent.futures.Future: The future of the background call.
     """
-    thread = threading.Thread(target=func, name=getattr(func, "__name__", None), args=args, kwargs=kwargs)
-    thread.daemon = True  # Set as daemon so it exits when main thread exits
-    thread.start()
+    future = _BG_EXECUTOR.submit(func, *args, **kwargs)
+    future.add_done_callback(_log_background_error)
+    return future
 
 def get_trace(e: Exception, n: int = 5):
     """Get the last n lines of the traceback for an exception"""
@@ -51,6 +73,7 @@ def run_parallel_exec(exec_func: Callable, iterable: Iterable, *func_args, **kwa
     
     Returns:
         list[tuple]: A list of tuples where each tuple contains the element from the `iterable` and the result of executing the `exec_func` function on that element.
+            The tuples are in the same order as the `iterable`.
 
     Example:
         >>> from app.utils.helpers import run_parallel_exec
@@ -58,23 +81,27 @@ def run_parallel_exec(exec_func: Callable, iterable: Iterable, *func_args, **kwa
         [(1, '1'), (2, '2'), (3, '3')]
     """
     func_name = f"{exec_func.__name__} | parallel_exec | " if hasattr(exec_func, "__name__") else "unknown | parallel_exec | "
+    quiet = kwargs.pop("quiet", False)
+    elements = list(iterable)
     with concurrent.futures.ThreadPoolExecutor(
         max_workers=kwargs.pop("max_workers", 100), thread_name_prefix=func_name
     ) as executor:
-        # Start the load operations and mark each future with each element
-        future_element_map = {
-            executor.submit(exec_func, element, *func_args): element
-            for element in iterable
+        # Start the load operations and mark each future with the index of its element
+        future_index_map = {
+            executor.submit(exec_func, element, *func_args): i
+            for i, element in enumerate(elements)
         }
-        result: list[tuple] = []
-        for future in concurrent.futures.as_completed(future_element_map):
-            element = future_element_map[future]
+        # Results are placed at their element's index, so they come out in input order
+        result: list[tuple] = [None] * len(elements)
+        for future in concurrent.futures.as_completed(future_index_map):
+            i = future_index_map[future]
+            element = elements[i]
             try:
-                result.append((element, future.result()))
+                result[i] = (element, future.result())
             except Exception as exc:
-                log_trace = exc if kwargs.pop("quiet", False) else get_trace(exc, 3)
+                log_trace = exc if quiet else get_trace(exc, 3)
                 logging.error(f"Got error while running parallel_exec: {element}: \n{log_trace}")
-                result.append((element, exc))
+                result[i] = (element, exc)
         return result
 
 def run_parallel_exec_but_return_in_order(exec_func: Callable, iterable: Iterable, *func_args, **kwargs):
@@ -82,13 +109,100 @@ def run_parallel_exec_but_return_in_order(exec_func: Callable, iterable: Iterabl
     Runs the `exec_func` function in parallel for each element in the `iterable` using a thread pool executor.
     Returns the result in the same order as the `iterable`.
     """
-    # note this is usable only when iterable has types that are hashable
-    result = run_parallel_exec(exec_func, iterable:=list(iterable), *func_args, **kwargs)
+    # run_parallel_exec already returns results in the order of the iterable
+    return [x[-1] for x in run_parallel_exec(exec_func, iterable, *func_args, **kwargs)]
+
+
+async def run_parallel_async(
+    coro_fn: Callable[..., Awaitable], iterable: Iterable, *func_args, max_concurrency: int = 100, quiet: bool = False
+):
+    """
+    Awaits `coro_fn` for each element in the `iterable` concurrently on the running event loop.
+
+    The async counterpart of `run_parallel_exec` for I/O-bound work: no threads are started,
+    and at most `max_concurrency` coroutines are in flight at once.
+
+    Parameters:
+        coro_fn (Callable[..., Awaitable]): The coroutine function to be awaited for each element in the `iterable`.
+        iterable (Iterable): The collection of elements for which `coro_fn` will be awaited.
+        *func_args: Additional positional arguments to be passed to `coro_fn`.
+        max_concurrency (int): The maximum number of coroutines in flight. Default is 100.
+        quiet (bool): If True, suppresses the traceback logging for exceptions. Default is False.
+
+    Returns:
+        list[tuple]: A list of (element, result) tuples in the same order as the `iterable`.
+            Where `coro_fn` raised, the result is the exception.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(element):
+        async with semaphore:
+            return await coro_fn(element, *func_args)
+
+    elements = list(iterable)
+    results = await asyncio.gather(*(run_one(element) for element in elements), return_exceptions=True)
+    for element, res in zip(elements, results):
+        if isinstance(res, Exception):
+            log_trace = res if quiet else get_trace(res, 3)
+            logging.error(f"Got error while running parallel_exec: {element}: \n{log_trace}")
+    return list(zip(elements, results))
+
+def run_parallel_coro(coro_fn: Callable[..., Awaitable], iterable: Iterable, *func_args, **kwargs):
+    """Blocking wrapper around `run_parallel_async` for synchronous callers."""
+    return asyncio.run(run_parallel_async(coro_fn, iterable, *func_args, **kwargs))
+
+
+PROCESS_POOL_MAX_WORKERS = os.cpu_count() or 1
+"""Upper bound on the shared process pool's size; CPU-bound workers beyond the core count only add overhead"""
+
+_GLOBAL_PROCESS_POOL: concurrent.futures.ProcessPoolExecutor | None = None
+_GLOBAL_PROCESS_POOL_SIZE = 0
+_GLOBAL_PROCESS_POOL_USERS = 0
+_GLOBAL_PROCESS_POOL_LOCK = threading.Lock()
+
+@contextlib.contextmanager
+def shared_process_pool(max_workers: int):
+    """
+    Context manager that hands out the shared ProcessPoolExecutor, creating it on first use.
+
+    The pool is reused across calls so the worker start-up cost is paid once. Its size is capped
+    at `PROCESS_POOL_MAX_WORKERS`. It is only replaced by a bigger one while no caller is inside
+    this context manager, so a pool is never shut down under a caller that is still submitting
+    to it; a caller that needs more workers while the pool is busy gets the current pool.
 
-    # sort the result in the same order as the iterable
-    result.sort(key=lambda x: iterable.index(x[0]))
+    Workers are started with "forkserver" where the platform supports it, which unlike "fork"
+    is safe from a multithreaded process (such as the Streamlit server). Everything submitted
+    must therefore be picklable by reference (module-level functions).
+
+    Args:
+        max_workers (int): The number of worker processes wanted.
 
-    return [x[-1] for x in result]
+    Yields:
+        concurrent.futures.ProcessPoolExecutor: The shared pool. Callers must not shut it down.
+    """
+    global _GLOBAL_PROCESS_POOL, _GLOBAL_PROCESS_POOL_SIZE, _GLOBAL_PROCESS_POOL_USERS
+    max_workers = max(1, min(max_workers, PROCESS_POOL_MAX_WORKERS))
+    with _GLOBAL_PROCESS_POOL_LOCK:
+        pool = _GLOBAL_PROCESS_POOL
+        if pool is None or (max_workers > _GLOBAL_PROCESS_POOL_SIZE and _GLOBAL_PROCESS_POOL_USERS == 0):
+            if pool is not None:
+                # Nobody holds the old pool, so nothing can be submitted to it any more
+                pool.shutdown(wait=False)
+            mp_context = (
+                multiprocessing.get_context("forkserver")
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else None
+            )
+            pool = _GLOBAL_PROCESS_POOL = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=mp_context
+            )
+            _GLOBAL_PROCESS_POOL_SIZE = max_workers
+        _GLOBAL_PROCESS_POOL_USERS += 1
+    try:
+        yield pool
+    finally:
+        with _GLOBAL_PROCESS_POOL_LOCK:
+            _GLOBAL_PROCESS_POOL_USERS -= 1
 
 
 def run_functions_in_parallel(
@@ -115,7 +229,8 @@ def run_functions_in_parallel(
     max_workers = min(max_workers, len(functions))
     def pool_executor():
         if parallelism == "process":
-            return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+            # The shared pool outlives this call; the context manager only releases it
+            return shared_process_pool(max_workers)
         elif parallelism == "thread":
             return concurrent.futures.ThreadPoolExecutor(
                 max_workers=max_workers, thread_name_prefix=f"{prefix} | parallel_func | "
@@ -144,20 +259,34 @@ def _execute_function(func: Callable, quiet: bool = False) -> Tuple[str, Any]:
         logging.error(f"Got error while running parallel_exec: {fname}: \n{log_trace}")
         return (fname, exc)
 
-def run_functions_in_parallel_process(functions: List[Callable], max_workers: int = 10, quiet: bool = False, **kwargs):
-    """Runs a list of functions in parallel using multiprocessing."""
+def run_functions_in_parallel_process(
+    functions: List[Callable], max_workers: int = 10, quiet: bool = False, ordered: bool = True, **kwargs
+):
+    """
+    Runs a list of functions in parallel using the shared process pool (see `shared_process_pool`).
+
+    With `ordered`, functions are sent to the workers in chunks, so pickling is amortized over
+    several calls. If `ordered` is False, results are returned in completion order, which lets
+    them drain as soon as each function finishes.
+    """
     max_workers = min(max_workers, len(functions))
+    chunksize = max(1, len(functions) // (max_workers * 4))
+
+    with shared_process_pool(max_workers) as pool:
+        if ordered:
+            return list(pool.map(_execute_function, functions, chunksize=chunksize))
+        futures = [pool.submit(_execute_function, func) for func in functions]
+        return [future.result() for future in concurrent.futures.as_completed(futures)]
 
-    with multiprocessing.Pool(processes=max_workers) as pool:
-        results = pool.map(_execute_function, functions)
-    return results
 
+_BACKTICK_RE = re.compile(r"```\w+\n(.*)\n```", flags=re.DOTALL)
+_COMMENT_RE = re.compile(r'\s+//\s+.*')
 
 def remove_backticks(text: str) -> str:
-    return re.sub(r"```\w+\n(.*)\n```", r"\1", text, flags=re.DOTALL)
+    return _BACKTICK_RE.sub(r"\1", text)
 
 def remove_comments(text: str) -> str:
-    return re.sub(r'\s+//\s+.*', '', text)
+    return _COMMENT_RE.sub('', text)
 
 def clean_json_str(text: str) -> str:
     cleaned_text = remove_backticks(text)
@@ -172,19 +301,93 @@ class Match(NamedTuple):
     text: str
     """The text that matched"""
     score: float
-    """The score of the match. 100 is a perfect match"""
+    """The (RapidFuzz, so float) score of the match. 100 is a perfect match"""
     
     def as_tuple(self) -> tuple[str, float]:
         return self.text, self.score
 
-def find_best_match(query: str, options: list[str], cutoff: int = 0):
-    """Find the best match from a list of options"""
+@lru_cache(maxsize=1024)
+def _processed(options: tuple[str, ...]) -> list[str]:
+    """The options after `default_process`, computed once per distinct set of options"""
+    return [fuzz_utils.default_process(o) for o in options]
+
+def find_best_match(query: str, options: list[str], cutoff: int = 0, scorer: Callable = fuzz.WRatio):
+    """
+    Find the best match from a list of options
+
+    With `scorer=fuzz.ratio` and a `cutoff`, options whose length alone keeps them below
+    the cutoff are dropped before scoring.
+    """
     if not options:
         return Match(None, 0)
-    return Match(*(process.extractOne(query, options, score_cutoff=cutoff) or (None, 0)))
+    options = tuple(options)
+    query = fuzz_utils.default_process(query)
+    choices = _processed(options)
+    indices = None
+    if scorer is fuzz.ratio and cutoff > 0:
+        # ratio = 2 * matches / (len(q) + len(o)) * 100 <= 2 * min(len(q), len(o)) / (len(q) + len(o)) * 100,
+        # so an option can only reach the cutoff if its length is within these bounds
+        c = cutoff / 100
+        lq = len(query)
+        # (with a little slack so float rounding never drops an option exactly on the bound)
+        lo, hi = lq * c / (2 - c) - 1e-9, lq * (2 - c) / c + 1e-9
+        indices = [i for i, o in enumerate(choices) if lo <= len(o) <= hi]
+        choices = [choices[i] for i in indices]
+    # fuzzywuzzy's preprocessing, but RapidFuzz's scorers: scores are floats and often differ from
+    # fuzzywuzzy's, so the best option can differ too
+    best = process.extractOne(query, choices, scorer=scorer, processor=None, score_cutoff=cutoff)
+    if best is None:
+        return Match(None, 0)
+    _, score, idx = best
+    if indices is not None:
+        idx = indices[idx]
+    return Match(options[idx], score)
+
+def find_best_matches(queries: list[str], options: list[str], cutoff: int = 0) -> list[Match]:
+    """
+    Find the best match from a list of options for every query.
+
+    Scores all queries against all options in one batched `rapidfuzz.process.cdist` call
+    (parallel over all cores), instead of one `find_best_match` call per query.
+
+    Args:
+        queries (list[str]): The strings to find matches for.
+        options (list[str]): The candidate strings.
+        cutoff (int, optional): The minimum score (0-100) for a match. Defaults to 0.
+
+    Returns:
+        list[Match]: The best match for each query, in the same order as `queries`.
+            `Match(None, 0)` where no option reaches `cutoff`.
+    """
+    if not queries:
+        return []
+    if not options:
+        return [Match(None, 0)] * len(queries)
+    options = tuple(options)
+    scores = process.cdist(
+        [fuzz_utils.default_process(q) for q in queries],
+        _processed(options),
+        scorer=fuzz.WRatio,
+        processor=None,
+        score_cutoff=cutoff,
+        workers=-1,
+    )
+    best_idx = scores.argmax(axis=1)
+    matches: list[Match] = []
+    for row, idx in enumerate(best_idx.tolist()):
+        score = float(scores[row, idx])
+        if cutoff > 0 and score < cutoff:
+            matches.append(Match(None, 0))
+        else:
+            matches.append(Match(options[idx], score))
+    return matches
 
 def recursive_string_operator(
-    data, fn: Callable[[str], str], skip_keys: list[str] = [], max_workers=4
+    data,
+    fn: Callable[[str], str],
+    skip_keys: list[str] = [],
+    max_workers=4,
+    batch_fn: Callable[[list[str]], list[str]] | None = None,
 ):
     """
     Recursively applies the given function to the input data, handling strings, lists, tuples, sets, dictionaries, and BaseModel objects.
@@ -194,6 +397,8 @@ def recursive_string_operator(
         fn: The function to be applied to the data.
         skip_keys: A list of keys to be skipped when processing dictionaries.
         max_workers: The maximum number of workers for parallel execution. Defaults to 4.
+        batch_fn: An optional batched version of `fn`, applied to whole collections of strings
+            in a single call (e.g. one model round-trip instead of one per string). Defaults to None.
 
     Returns:
         The processed data in the same format as the input.
@@ -201,6 +406,9 @@ def recursive_string_operator(
     Note:
         The `fn` function should take a single argument (a string) and return a string. 
         Also, any Exceptions raised by the `fn` function should be caught and handled appropriately.
+
+        The `batch_fn` function should take a list of strings and return a list of the same length,
+        with the results in the same order. If it doesn't, `fn` is applied to each string instead.
         
         The `skip_keys` parameter works only when the input data is a dictionary or a BaseModel object. 
     
@@ -219,18 +427,16 @@ def recursive_string_operator(
 
     # Define a base function to recursively apply on each element
     base_parallel_func = lambda _data: recursive_string_operator(
-        data=_data, fn=fn, skip_keys=skip_keys or [], max_workers=max_workers
+        data=_data, fn=fn, skip_keys=skip_keys or [], max_workers=max_workers, batch_fn=batch_fn
     )
 
     if isinstance(data, (list, tuple, set)):
         # Check if all elements in the collection are strings
-        are_all_strings = all([isinstance(x, str) for x in data])
-        if are_all_strings:
-            _combined = "||".join(data)
-            if len(_combined) < 1000:  # Optimize by processing combined strings if not too large
-                _operated = fn(_combined).split("||")
-                if len(_operated) == len(data):  # Ensure length remains consistent
-                    return _operated
+        are_all_strings = all(isinstance(x, str) for x in data)
+        if are_all_strings and batch_fn is not None:
+            _operated = batch_fn(list(data))
+            if len(_operated) == len(data):  # Ensure length remains consistent
+                return list(_operated)
         
         # Apply function to each element in parallel
         return [
@@ -242,24 +448,14 @@ def recursive_string_operator(
 
     if isinstance(data, dict):
         # Process non-skipped dictionary values in parallel
-        v_return_tuples = run_parallel_exec(
+        skip = set(skip_keys)
+        operated = iter(run_parallel_exec_but_return_in_order(
             base_parallel_func,
-            [v for k, v in data.items() if k not in skip_keys],
+            [v for k, v in data.items() if k not in skip],
             max_workers=max_workers,
-        )
-        # Sort results to maintain order
-        v_return_tuples.sort(
-            key=lambda x: [v for k, v in data.items() if k not in skip_keys].index(x[0])
-        )
-        # Construct result dictionary
-        return {
-            k: (
-                ([y for x, y in v_return_tuples if x == v] or [v])[0]
-                if k not in skip_keys
-                else v
-            )
-            for k, v in data.items()
-        }
+        ))
+        # Construct result dictionary; results come back in item order, so consume them in step
+        return {k: v if k in skip else next(operated) for k, v in data.items()}
 
     # Return data unchanged for unsupported types
     return data
@@ -288,18 +484,18 @@ def recursive_dict_operator(d: dict, fn: Callable[[dict], MutableMapping]):
         >>> result
         {'A': 1, 'B': {'C': 'hello', 'D': 'world'}}
     """
-    has_dict = any(isinstance(v, dict) for _, v in d.items())
-    if has_dict:
-        # If the dictionary has any sub-dictionaries, process them recursively
-        return fn(
-            {
-                k: recursive_dict_operator(v, fn) if isinstance(v, dict) else v
-                for k, v in d.items()
-            }
-        )
-    else:
-        # If the dictionary has no sub-dictionaries, apply the function directly
-        return fn(d)
+    # Single pass: the copy is only started at the first sub-dictionary
+    out = None
+    for i, (k, v) in enumerate(d.items()):
+        if isinstance(v, dict):
+            if out is None:
+                out = dict(itertools.islice(d.items(), i))
+            # Process sub-dictionaries recursively
+            out[k] = recursive_dict_operator(v, fn)
+        elif out is not None:
+            out[k] = v
+    # If the dictionary has no sub-dictionaries, apply the function to it directly
+    return fn(d if out is None else out)
 
 def get_file_hash(file_path: str, hash_algorithm='sha256'):
     """
@@ -318,12 +514,9 @@ def get_file_hash(file_path: str, hash_algorithm='sha256'):
     str
         The hexadecimal representation of the hash.
     """
-    hash_obj = hashlib.new(hash_algorithm)
-    
-    # Read the file in binary mode and update the hash object
+    # Read the file in binary mode and let hashlib feed it to the C hash routine directly
     with open(file_path, 'rb') as file:
-        while chunk := file.read(8192):
-            hash_obj.update(chunk)
+        hash_obj = hashlib.file_digest(file, hash_algorithm)
     
     # Return the hexadecimal representation of the hash
     return hash_obj.hexdigest()
@@ -362,6 +555,10 @@ def recursively_remove_keys_from_dict(data: dict, keys: list[str]) -> dict:
     Returns:
         dict: A new dictionary with the specified keys removed.
     """
+    # Convert the keys to a set once, so each lookup is O(1) instead of a list scan
+    return _remove_keys(data, frozenset(keys))
+
+def _remove_keys(data: dict, keys: frozenset[str]) -> dict:
     if not isinstance(data, dict):
         return data
 
@@ -372,13 +569,17 @@ def recursively_remove_keys_from_dict(data: dict, keys: list[str]) -> dict:
         if key not in keys:
             if isinstance(value, dict):
                 # Recursively remove keys from nested dictionary
-                cleaned_dict[key] = recursively_remove_keys_from_dict(value, keys)
+                cleaned_dict[key] = _remove_keys(value, keys)
             elif isinstance(value, list):
-                # If the value is a list, recursively apply the function to its items
-                cleaned_dict[key] = [
-                    recursively_remove_keys_from_dict(item, keys) if isinstance(item, dict) else item
-                    for item in value
-                ]
+                if any(isinstance(item, dict) for item in value):
+                    # If the list holds dictionaries, recursively apply the function to its items
+                    cleaned_dict[key] = [
+                        _remove_keys(item, keys) if isinstance(item, dict) else item
+                        for item in value
+                    ]
+                else:
+                    # Nothing to recurse into, so just copy the list
+                    cleaned_dict[key] = list(value)
             else:
                 cleaned_dict[key] = value
 
@@ -430,7 +631,10 @@ def get_range(rng: str|list[int]):
             elif len(low_high) == 1:
                 # If the input string contains an individual number, add it
                 # to the list of IDs.
-                all_ids.extend([int(x)])
+                all_ids.append(int(x))
+        # The list was built here, so sort it in place instead of copying it
+        all_ids.sort()
+        return all_ids
     # Return a sorted list of integers derived from the input string or list.
     return sorted(all_ids)
 
@@ -460,31 +664,12 @@ def list_to_range(lst: list[int]) -> str:
         # If the list is empty, return an empty string.
         return ""
     
-    ranges = []
-    start = lst[0]
-    end = lst[0]
-    
-    for num in lst[1:]:
-        # If the current number is consecutive with the previous one, update 'end'.
-        if num == end + 1:
-            end = num
-        else:
-            # If not, generate the range string for the current range.
-            if start == end:
-                # If the range only contains one number, just add it to the list.
-                ranges.append(str(start))
-            else:
-                # If the range contains multiple numbers, add the range string to the list.
-                ranges.append(f"{start}-{end}")
-            # Update 'start' and 'end' to the current number.
-            start = num
-            end = num
-    
-    # Generate the range string for the last range.
-    if start == end:
-        ranges.append(str(start))
-    else:
-        ranges.append(f"{start}-{end}")
+    # Indices where a new run starts, i.e. where a number is not the previous one + 1
+    breaks = [i for i, (prev, num) in enumerate(zip(lst, lst[1:]), 1) if num != prev + 1]
     
+    # Generate the range string for each run; a run of one number is just that number.
     # Join the ranges with commas and return the result.
-    return ",".join(ranges)
+    return ",".join(
+        str(lst[start]) if end - start == 1 else f"{lst[start]}-{lst[end - 1]}"
+        for start, end in zip([0, *breaks], [*breaks, len(lst)])
+    )
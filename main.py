@@ -1,5 +1,7 @@
-import os
+import hmac
+import shutil
 import streamlit as st
+from pathlib import Path
 from tempfile import NamedTemporaryFile
 
 from models.modules import Modules
@@ -14,8 +16,11 @@ st.set_page_config(
 
 st.title("AutoRFP")
 
+_TOKEN_BYTES = TOKEN.encode() if TOKEN else None
+
 def check_token(token: str):
-    return token == TOKEN
+    # Constant-time compare, so the response time doesn't leak how much of the token matched
+    return bool(_TOKEN_BYTES and token) and hmac.compare_digest(token.encode(), _TOKEN_BYTES)
 
 token_input = st.text_input("Enter Token to use the App", type="password", key="token_input")
 is_valid_token = check_token(token_input)
@@ -35,52 +40,65 @@ if is_valid_token:
     def generate_modules(file_path: str, _regenerate: bool):
         return Modules.from_file(file_path, regenerate=_regenerate)
 
+    # Caching every serialized payload in one go, so widget interactions don't redo them; `_modules` is not hashed, `modules_hash` keys the cache
+    @st.cache_data(show_spinner=False)
+    def build_payloads(_modules: Modules, modules_hash: int):
+        df, pivot_df = _modules.to_df_pair(title_cased=True)
+        return {
+            "json": _modules.to_json().encode(),
+            "yaml": _modules.to_yaml().encode(),
+            "csv": Modules.to_csv(df, add_total_hours_row=True).encode(),
+            "pivot_csv": Modules.to_csv(pivot_df, add_total_hours_row=True).encode(),
+            "df": df,
+            "pivot_df": pivot_df,
+            "total_hours": float(df["Hours"].to_numpy().sum()),
+        }
+
     # Display results upon file upload
     if uploaded_file:
         try:
             with NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as temp_file:
-                temp_file.write(uploaded_file.read())
+                shutil.copyfileobj(uploaded_file, temp_file, length=1 << 20)
                 temp_path = temp_file.name
 
             # Generate modules using the cached function
             modules = generate_modules(temp_path, regenerate)
-            json_data = modules.to_json()
-            yaml_data = modules.to_yaml()
+            modules_hash = hash(modules)
 
-            # Convert to DataFrame
-            df = modules.to_df(title_cased=True)
-            pivot_df = modules.to_df(pivot_by_categories=True, title_cased=True)
+            # Serialize and convert to DataFrame
+            payloads = build_payloads(modules, modules_hash)
+            df, pivot_df = payloads["df"], payloads["pivot_df"]
 
             col1, col2, col3, col4 = st.columns(4, vertical_alignment="center")
 
             # Show the total hours for the entire project
-            st.metric(label="Total Estimated Hours", value=df['Hours'].sum(), delta=None)
+            st.metric(label="Total Estimated Hours", value=payloads["total_hours"], delta=None)
 
             # Let the user download in either JSON or YAML format
             col1.download_button(
                 label="Download JSON",
-                data=json_data,
+                data=payloads["json"],
                 file_name=f"{modules.slug}.json",
                 mime="application/json",
                 key="download_json",
             )
             col2.download_button(
                 label="Download YAML",
-                data=yaml_data,
+                data=payloads["yaml"],
                 file_name=f"{modules.slug}.yaml",
                 mime="text/yaml",
                 key="download_yaml",
             )
             col3.download_button(
                 label="Download CSV",
-                data=Modules.to_csv(df, add_total_hours_row=True),
+                data=payloads["csv"],
                 file_name=f"{modules.slug}.csv",
                 mime="text/csv",
                 key="download_csv",
             )
             col4.download_button(
                 label="Download Pivot CSV",
-                data=Modules.to_csv(pivot_df, add_total_hours_row=True),
+                data=payloads["pivot_csv"],
                 file_name=f"{modules.slug}_pivot.csv",
                 mime="text/csv",
                 key="download_pivot_csv",
@@ -104,8 +122,7 @@ if is_valid_token:
         finally:
             try:
                 # Ensure the temporary file is deleted
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+                Path(temp_path).unlink(missing_ok=True)
             except Exception:
                 pass
 else:
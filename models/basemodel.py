@@ -63,31 +63,106 @@ Usage Examples:
 
 import json
 import logging
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
 import yaml
+import orjson
 from pydantic.main import IncEx
-from pydantic import BaseModel as PydanticBaseModel
+from pydantic import BaseModel as PydanticBaseModel, PrivateAttr
 
 from helpers import cache_utils as cas
-from helpers.utils import clean_yaml_str, clean_json_str, find_best_match, run_in_background
+from helpers.utils import clean_yaml_str, clean_json_str, find_best_matches, run_in_background
 
 
 PathLike = str | Path
 
 
-class DoubleQuotedDumper(yaml.SafeDumper):
+# libyaml-backed loader and dumper, falling back to the pure-Python ones if PyYAML was built without it
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+class DoubleQuotedDumper(SafeDumper):
     def represent_str(self, data):
         return self.represent_scalar('tag:yaml.org,2002:str', data, style='"')
 
-yaml.add_representer(str, DoubleQuotedDumper.represent_str)
+DoubleQuotedDumper.add_representer(str, DoubleQuotedDumper.represent_str)
+
+
+_DEFAULT_DUMP_PARAMS: dict[str, Any] = dict(
+    include=None,
+    exclude=None,
+    context=None,
+    by_alias=False,
+    exclude_unset=False,
+    exclude_defaults=False,
+    exclude_none=False,
+    round_trip=False,
+    warnings=True,
+    serialize_as_any=False,
+)
+"""The `model_dump` arguments whose JSON-mode result `BaseModel` memoizes"""
 
 
 class BaseModel(PydanticBaseModel):
+    _memo: dict[str, Any] = PrivateAttr(default_factory=dict)
+    """Memoized serializations (the default JSON-mode dump, YAML and hash), cleared whenever a field is set and reset on copy"""
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._memo.clear()
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _cached_property_names(cls) -> tuple[str, ...]:
+        """Names of the `cached_property` attributes of the class, whose values live in the instance `__dict__`"""
+        return tuple({
+            name for klass in cls.__mro__ for name, attr in vars(klass).items()
+            if isinstance(attr, cached_property)
+        })
+
+    def _reset_copy(self):
+        """
+        Gives a fresh copy its own empty memo and drops the `cached_property` values it inherited,
+        since the copy may get different field values (`model_copy(update=...)`)
+        """
+        self._memo = {}
+        for name in self._cached_property_names():
+            self.__dict__.pop(name, None)
+        return self
+
+    def __copy__(self):
+        # `model_copy` goes through here, and pydantic shallow-copies the private attributes
+        return super().__copy__()._reset_copy()
+
+    def __deepcopy__(self, memo: dict[int, Any] | None = None):
+        return super().__deepcopy__(memo)._reset_copy()
+
+    def _json_dict(self, **params) -> dict[str, Any]:
+        """
+        `to_dict(mode="json", **params)`, computed once and reused while `params` are the defaults.
+
+        The returned dict may be shared, so callers must not modify it. Mutating a nested model
+        in place does not reset the memo of its parents.
+        """
+        if params and params != _DEFAULT_DUMP_PARAMS:
+            return self.to_dict(mode="json", **params)
+        if "json_dict" not in self._memo:
+            self._memo["json_dict"] = self.to_dict(mode="json")
+        return self._memo["json_dict"]
+
     def __str__(self):
         return str(self.to_dict())
 
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _field_names(cls) -> tuple[str, ...]:
+        """The names of the model's fields, computed once per class"""
+        return tuple(cls.model_fields)
+
     # def __repr__(self):
     #     return str(self.to_dict())
 
@@ -103,19 +178,25 @@ class BaseModel(PydanticBaseModel):
 
         Returns:
             BaseModel: The created BaseModel object.
+
+        Note:
+            Keys are matched with RapidFuzz's WRatio, whose scores differ from fuzzywuzzy's, so for
+            inexact keys the mapping can differ from the one the fuzzywuzzy version picked.
         """
         if not fuzzy:
             return cls(**data)
         if not isinstance(cutoff, float) or cutoff > 1 or cutoff < 0:
             cutoff = 0.0
-        field_col_map = {
-            field: find_best_match(field, list(data)).as_tuple()
-            for field in cls.model_fields
-        }
+        fields = cls._field_names()
+        if all(field in data for field in fields):
+            # Every field has an exact key, which is also what fuzzy matching would pick
+            return cls(**{field: data[field] for field in fields})
+        # Match every field against every key in one batched call; cutoff is 0-1, scores are 0-100
+        matches = find_best_matches(fields, list(data), cutoff=cutoff * 100)
         data = {
-            field: data[col] 
-            for field, (col, score) in field_col_map.items() 
-            if score >= cutoff
+            field: data[col]
+            for field, (col, score) in zip(fields, matches)
+            if col is not None
         }
         return cls(**data)
 
@@ -133,7 +214,7 @@ class BaseModel(PydanticBaseModel):
             BaseModel: The created BaseModel object.
         """
         data = clean_json_str(data)
-        data = json.loads(data)
+        data = orjson.loads(data)
         return cls.from_dict(data, fuzzy, cutoff)
 
     @classmethod
@@ -150,7 +231,7 @@ class BaseModel(PydanticBaseModel):
             BaseModel: The created BaseModel object.
         """
         data = clean_yaml_str(data)
-        data = yaml.safe_load(data)
+        data = yaml.load(data, Loader=SafeLoader)
         return cls.from_dict(data, fuzzy, cutoff)
     
     @classmethod
@@ -167,14 +248,21 @@ class BaseModel(PydanticBaseModel):
             BaseModel: The created BaseModel object.
         """
         path = Path(path)
-        data = path.read_text(encoding="utf-8")
-
-        if path.suffix == ".json":
-            return cls.from_json(data, fuzzy, cutoff) 
-        elif path.suffix in [".yml", ".yaml"]:
-            return cls.from_yaml(data, fuzzy, cutoff)
-        else:
+        suffix = path.suffix.lower()
+        if suffix not in [".json", ".yml", ".yaml"]:
             raise ValueError("Invalid file format. Must be .json or .yaml.")
+        # orjson and libyaml decode UTF-8 themselves, so the bytes are parsed directly
+        # unless there is something for clean_json_str/clean_yaml_str to strip
+        raw = path.read_bytes()
+
+        if suffix == ".json":
+            if b"```" in raw or b"//" in raw:
+                return cls.from_json(raw.decode("utf-8"), fuzzy, cutoff)
+            return cls.from_dict(orjson.loads(raw), fuzzy, cutoff)
+        else:
+            if b"```" in raw:
+                return cls.from_yaml(raw.decode("utf-8"), fuzzy, cutoff)
+            return cls.from_dict(yaml.load(raw, Loader=SafeLoader), fuzzy, cutoff)
 
     def to_dict(
         self,
@@ -212,6 +300,12 @@ class BaseModel(PydanticBaseModel):
         Returns:
             A dictionary representation of the model.
         """
+        if (
+            include is None and exclude is None and context is None and not by_alias
+            and not exclude_unset and not exclude_defaults and not exclude_none
+            and not round_trip and warnings is True and not serialize_as_any
+        ):
+            return self.model_dump(mode=mode)
         return self.model_dump(
             mode=mode,
             include=include,
@@ -244,6 +338,9 @@ class BaseModel(PydanticBaseModel):
         """
         Generate a JSON representation of the model, optionally specifying which fields to include or exclude.
 
+        Without `sort_keys`, pydantic-core emits the JSON directly (`model_dump_json`), skipping the
+        intermediate dict; sorted output is built from the dict with orjson (or `json` for indents other than 2).
+
         Args:
             indent: The indentation level to use when serializing the model.
             sort_keys: Whether to sort the keys in the output.
@@ -262,8 +359,7 @@ class BaseModel(PydanticBaseModel):
         Returns:
             A JSON representation of the model in string format.
         """
-        d = self.to_dict(
-            mode="json",
+        params = dict(
             include=include,
             exclude=exclude,
             context=context,
@@ -275,7 +371,24 @@ class BaseModel(PydanticBaseModel):
             warnings=warnings,
             serialize_as_any=serialize_as_any,
         )
-        return json.dumps(d, indent=indent, sort_keys=sort_keys)
+        if not sort_keys:
+            return self.model_dump_json(indent=indent, **params)
+        return self._sorted_json_bytes(indent, **params).decode()
+
+    def _to_json_bytes(self, indent, sort_keys: bool, **params) -> bytes:
+        """`to_json` as UTF-8 bytes"""
+        if not sort_keys:
+            return self.model_dump_json(indent=indent, **params).encode()
+        return self._sorted_json_bytes(indent, **params)
+
+    def _sorted_json_bytes(self, indent, **params) -> bytes:
+        """The JSON with sorted keys, built from the (memoized) dict"""
+        d = self._json_dict(**params)
+        if indent not in (None, 2):
+            # orjson can only indent by 2 spaces
+            return json.dumps(d, indent=indent, sort_keys=True).encode()
+        option = (orjson.OPT_INDENT_2 if indent else 0) | orjson.OPT_SORT_KEYS
+        return orjson.dumps(d, option=option, default=str)
 
     def to_yaml(
         self,
@@ -317,8 +430,7 @@ class BaseModel(PydanticBaseModel):
         Returns:
             A YAML representation of the model in string format.
         """
-        d = self.to_dict(
-            mode="json",
+        params = dict(
             include=include,
             exclude=exclude,
             context=context,
@@ -330,13 +442,21 @@ class BaseModel(PydanticBaseModel):
             warnings=warnings,
             serialize_as_any=serialize_as_any,
         )
-        return yaml.dump(
-            d,
+        # The default YAML (what the app renders and downloads) is memoized like the dump it comes from
+        is_default = indent == 4 and width == 1000 and not sort_keys and allow_unicode and params == _DEFAULT_DUMP_PARAMS
+        if is_default and "yaml" in self._memo:
+            return self._memo["yaml"]
+        text = yaml.dump(
+            self._json_dict(**params),
+            Dumper=DoubleQuotedDumper,
             allow_unicode=allow_unicode,
             sort_keys=sort_keys,
             indent=indent,
             width=width,
         )
+        if is_default:
+            self._memo["yaml"] = text
+        return text
 
     def to_file(
         self, 
@@ -373,9 +493,7 @@ class BaseModel(PydanticBaseModel):
                 "error" raises a [`PydanticSerializationError`][pydantic_core.PydanticSerializationError].
             serialize_as_any: Whether to serialize fields with duck-typing serialization behavior.
         """
-        common_params = dict(
-            indent=indent,
-            sort_keys=sort_keys,
+        params = dict(
             include=include,
             exclude=exclude,
             context=context,
@@ -388,20 +506,33 @@ class BaseModel(PydanticBaseModel):
             serialize_as_any=serialize_as_any,
         )
         path = Path(path)
+        # Serialize straight to UTF-8 bytes instead of building a str and re-encoding it
         if path.suffix == ".json":
-            path.write_text(self.to_json(**common_params), encoding="utf-8")
+            path.write_bytes(self._to_json_bytes(indent, sort_keys, **params))
         elif path.suffix in [".yml", ".yaml"]:
-            path.write_text(self.to_yaml(**common_params), encoding="utf-8")
+            with path.open("wb") as f:
+                yaml.dump(
+                    self._json_dict(**params),
+                    f,
+                    Dumper=DoubleQuotedDumper,
+                    encoding="utf-8",
+                    allow_unicode=True,
+                    sort_keys=sort_keys,
+                    indent=indent,
+                    width=1000,
+                )
         else:
             raise ValueError("Invalid file format. Must be .json or .yaml.")
 
     def __hash__(self) -> int:
-        return hash(self.to_yaml())
+        if "hash" not in self._memo:
+            self._memo["hash"] = hash(orjson.dumps(self._json_dict(), option=orjson.OPT_SORT_KEYS))
+        return self._memo["hash"]
 
     def __eq__(self, other: "BaseModel") -> bool:
         if not isinstance(other, BaseModel):
             return False
-        return self.to_yaml() == other.to_yaml()
+        return self._json_dict() == other._json_dict()
 
     @classmethod
     def load_from_cache(cls, key: str, collection: str = None, get_expired: bool = False, return_as_dict: bool = False):
@@ -446,9 +577,9 @@ class BaseModel(PydanticBaseModel):
         """
         collection = collection or self.__class__.__name__
         if background:
-            run_in_background(cas.save, key, collection, self.to_dict(), expire_after_seconds=expire_after_seconds)
+            run_in_background(cas.save, key, collection, self._json_dict(), expire_after_seconds=expire_after_seconds)
         else:
-            cas.save(key, collection, self.to_dict(), expire_after_seconds=expire_after_seconds)
+            cas.save(key, collection, self._json_dict(), expire_after_seconds=expire_after_seconds)
 
     @classmethod
     def delete_from_cache(cls, key: str, collection: str = None):
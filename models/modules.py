@@ -1,25 +1,31 @@
+import io
+import os
 import csv
-import json
+import logging
 from enum import Enum
+from collections import defaultdict
+from functools import cached_property, lru_cache
 from typing import List
 
+import orjson
 import pandas as pd
-from pydantic import Field
+from pydantic import ConfigDict, Field, ValidationError
 import plotly.graph_objects as go
 
 from helpers.utils import hash_uuid
 from models.basemodel import BaseModel
 from config import SANKEY_TEMPLATE_PATH
-from helpers.openai_wrapper import call_openai
+from helpers.openai_wrapper import SYSTEM_MSG, call_openai
 from helpers.text_utils import read_prompt, slugify, snake_to_title
-from helpers.readers import (
-    read_docx,
-    read_excel,
-    read_mp3,
-    read_pdf,
-    read_wav,
-    read_text,
-)
+from helpers.readers import get_extension, read
+
+
+@lru_cache(maxsize=1)
+def _sankey_template() -> tuple[str, str]:
+    """The Sankey HTML template, read once and split around its `{{SANKEY_JSON}}` placeholder"""
+    html = SANKEY_TEMPLATE_PATH.read_text(encoding="utf-8")
+    prefix, _, suffix = html.partition("{{SANKEY_JSON}}")
+    return prefix, suffix
 
 
 class TaskCategory(str, Enum):
@@ -28,11 +34,14 @@ class TaskCategory(str, Enum):
     AI = "AI"
 
     @classmethod
+    @lru_cache(maxsize=None)
     def comma_separated(cls):
-        return ", ".join(x.value for x in TaskCategory)
+        return ", ".join(x.value for x in cls)
 
 
 class TaskCategoryModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     category: TaskCategory | str = f"Can be one of {TaskCategory.comma_separated()}"
     hours: float = Field(
         "Estimated amount of hours required. Must be an int or float greater than 0", ge=0
@@ -42,6 +51,8 @@ class TaskCategoryModel(BaseModel):
 
 
 class TaskModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     task: str = "Name of the task"
     description: str = "Description of the Task along with what to implement"
     categories: List[TaskCategoryModel] = [
@@ -49,9 +60,9 @@ class TaskModel(BaseModel):
     ]
     short_name: str = "A very short name for the task (2-4 words). Must be unique."
 
-    @property
+    @cached_property
     def hours(self):
-        return sum([c.hours for c in self.categories])
+        return sum(c.hours for c in self.categories)
     
     @property
     def subtasks(self):
@@ -59,20 +70,24 @@ class TaskModel(BaseModel):
 
 
 class ModuleModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     module: str = "Name of the bigger module which the tasks are a part of."
     short_name: str = "A very short name for the module (2-4 words). Must be unique."
     tasks: List[TaskModel] = [TaskModel()]
     
-    @property
+    @cached_property
     def hours(self):
-        return sum([t.hours for t in self.tasks])
+        return sum(t.hours for t in self.tasks)
     
-    @property
+    @cached_property
     def subtasks(self):
-        return sum([t.subtasks for t in self.tasks])
+        return sum(t.subtasks for t in self.tasks)
 
 
 class Modules(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     project_name: str = "Name of the project."
     modules: List[ModuleModel] = [ModuleModel()]
 
@@ -80,13 +95,19 @@ class Modules(BaseModel):
     def slug(self):
         return slugify(self.project_name)
     
-    @property
+    @cached_property
     def hours(self):
-        return sum([m.hours for m in self.modules])
+        return sum(m.hours for m in self.modules)
     
-    @property
+    @cached_property
     def subtasks(self):
-        return sum([m.subtasks for m in self.modules])
+        return sum(m.subtasks for m in self.modules)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _default_json(cls) -> str:
+        """The JSON of a default instance, used as the output format in the prompt. Built once per class."""
+        return cls().to_json()
 
     @classmethod
     def from_sow(cls, sow: str, best_of: int = 3, regenerate: bool = False):
@@ -101,38 +122,53 @@ class Modules(BaseModel):
         Returns:
             Modules: The Modules object created from the SOW string.
         """
-        sow_hash = hash_uuid(sow).hex
+        # Key on the SOW with whitespace normalized, so re-flowed or re-indented copies of it still hit
+        sow_hash = hash_uuid(" ".join(sow.split())).hex
         
         # Try to load the object from the cache
         if not regenerate:
             obj = cls.load_from_cache(key=sow_hash, return_as_dict=False)
+            if obj is None and (legacy_hash := hash_uuid(sow).hex) != sow_hash:
+                # Entries cached before the key was normalized
+                obj = cls.load_from_cache(key=legacy_hash, return_as_dict=False)
             if obj and isinstance(obj, cls):
                 return obj
         
-        # Generate the prompt for the AI
+        # Generate the prompt for the AI; the static instructions come first and the SOW last,
+        # so OpenAI's prompt caching can reuse the shared prefix across different SOWs
         prompt = read_prompt(
             "user",
             {
                 "sow": sow,
                 "categories": TaskCategory.comma_separated(),
-                "output_format": Modules().to_yaml(),
+                "output_format": cls._default_json(),
             },
         )
         
         # Ask the AI to generate responses
         responses = call_openai(
-            messages=[{"role": "user", "content": prompt}], 
+            messages=[dict(SYSTEM_MSG), {"role": "user", "content": prompt}], 
             model="gpt-4o", 
             temperature=0.2, 
             n=best_of, 
+            # Not cached here: the validated object is cached below, and caching the raw
+            # responses would replay the same invalid samples on every retry
+            use_cache=False, 
+            parallel=True, 
+            # Guarantees syntactically valid JSON, which pydantic parses and validates in one pass
+            response_format={"type": "json_object"}, 
         )
         
-        # Parse the responses and create Modules objects
-        objects = sorted(
-            [cls.from_yaml(resp) for resp in responses], 
-            key=lambda x: (x.subtasks, x.hours), 
-            reverse=True, 
-        )
+        # Parse the responses and create Modules objects, skipping any sample that doesn't validate
+        objects = []
+        for resp in responses:
+            try:
+                objects.append(cls.model_validate_json(resp))
+            except ValidationError as e:
+                logging.warning(f"Discarding a {cls.__name__} sample that failed validation: {e}")
+        if not objects:
+            raise ValueError(f"None of the {len(responses)} responses was a valid {cls.__name__}")
+        objects.sort(key=lambda x: (x.subtasks, x.hours), reverse=True)
         
         # Take the best response and save it to the cache
         obj = objects[0]
@@ -161,45 +197,28 @@ class Modules(BaseModel):
         Raises:
             ValueError: If the file format is unsupported.
         """
-        ext = path.split(".")[-1]
-        if ext == "pdf":
-            data = read_pdf(path)
-        elif ext == "docx":
-            data = read_docx(path)
-        elif ext == "xlsx":
-            data = read_excel(path)
-        elif ext == "mp3":
-            data = read_mp3(path)
-        elif ext == "wav":
-            data = read_wav(path)
-        elif ext in ["txt", "md"]:
-            data = read_text(path)
-        elif ext in ["yml", "yaml", "json"]:
+        if get_extension(path) in (".yml", ".yaml", ".json"):
             return super().from_file(path)
-        else:
-            raise ValueError("Unsupported file format!")
+        # Dispatches on the (lowercased) extension, raising ValueError if it is unsupported
+        data = read(path)
         return cls.from_sow(data, best_of, regenerate)
 
     @staticmethod
     def pivot_df_by_categories(df: pd.DataFrame):
-        pivot1 = df.pivot_table(
-            index=["module", "task", "description"],
-            columns="category",
-            values=["hours"],
-            aggfunc="sum",
-            fill_value=0,
-        )
-        pivot2 = df.pivot_table(
-            index=["module", "task", "description"],
-            columns="category",
-            values=["subtask"],
-            aggfunc=lambda x: ", ".join(x),
-            fill_value="",
+        # One groupby computes both aggregates; observed=True skips unused category combinations
+        df = df.assign(category=df["category"].astype("category"))
+        grouped = df.groupby(["module", "task", "description", "category"], observed=True).agg(
+            hours=("hours", "sum"),
+            subtask=("subtask", ", ".join),
         )
-        pivot = pivot1.merge(pivot2, left_index=True, right_index=True)
+        hours = grouped["hours"].unstack("category", fill_value=0)
+        subtasks = grouped["subtask"].unstack("category", fill_value="")
+
+        # Flatten to `<category>_<value>` columns
+        hours.columns = [f"{c}_hours" for c in hours.columns]
+        subtasks.columns = [f"{c}_subtask" for c in subtasks.columns]
+        pivot = hours.join(subtasks)
 
-        # Flatten the multi-index columns
-        pivot.columns = [f"{col[1]}_{col[0]}" for col in pivot.columns]
         # Sort the columns
         pivot = pivot.reindex(columns=sorted(pivot.columns))
         # Reset index to make it a proper DataFrame
@@ -209,45 +228,70 @@ class Modules(BaseModel):
     
     @staticmethod
     def to_csv(df: pd.DataFrame, add_total_hours_row: bool = True) -> str:
-        df = df.copy()
+        buf = io.StringIO()
+        df.to_csv(buf, index=False, quoting=csv.QUOTE_NONNUMERIC, lineterminator=os.linesep)
         if add_total_hours_row:
-            df.loc[len(df)] = [x if isinstance(x, (float, int)) else "" for x in df.sum()]
-        csv_text = df.to_csv(index=False, quoting=csv.QUOTE_NONNUMERIC)
-        return csv_text
+            # Written after the frame instead of appended to a copy of it, so no column gets upcast to object
+            totals = df.select_dtypes(include="number").sum()
+            writer = csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC, lineterminator=os.linesep)
+            writer.writerow([totals[c].item() if c in totals.index else "" for c in df.columns])
+        return buf.getvalue()
+
+    def _flat_df(self) -> pd.DataFrame:
+        # One row per category, built column-wise; a category field shadows a task field of the same name
+        task_fields = [f for f in TaskModel.model_fields if f != "categories"]
+        category_fields = list(TaskCategoryModel.model_fields)
+        task_only_fields = [f for f in task_fields if f not in category_fields]
+        columns = {name: [] for name in ["module", *task_fields, *category_fields]}
+        for module in self.modules:
+            for task in module.tasks:
+                n = len(task.categories)
+                task_dict = task.to_dict(include=set(task_only_fields))
+                columns["module"].extend([module.module] * n)
+                for f in task_only_fields:
+                    columns[f].extend([task_dict[f]] * n)
+                for category in task.categories:
+                    for f, value in category.to_dict().items():
+                        columns[f].append(value)
+        return pd.DataFrame(columns)
 
     def to_df(self, title_cased: bool = False, pivot_by_categories: bool = False):
-        df = pd.DataFrame(
-            [
-                {
-                    "module": module.module,
-                    **task.to_dict(exclude=["categories"]),
-                    **category.to_dict(),
-                }
-                for module in self.modules
-                for task in module.tasks
-                for category in task.categories
-            ]
-        )
+        df = self._flat_df()
         if pivot_by_categories:
             df = self.pivot_df_by_categories(df)
         if title_cased:
             df.columns = map(snake_to_title, df.columns)
         return df
+
+    def to_df_pair(self, title_cased: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Returns both `to_df()` and `to_df(pivot_by_categories=True)`, building the
+        underlying frame only once.
+        """
+        df = self._flat_df()
+        pivot_df = self.pivot_df_by_categories(df)
+        if title_cased:
+            df.columns = map(snake_to_title, df.columns)
+            pivot_df.columns = map(snake_to_title, pivot_df.columns)
+        return df, pivot_df
     
     def to_plotly_fig(self):
-        df = pd.DataFrame([
-            {
-                "project": self.project_name,
-                "module": module.short_name,
-                "task": task.short_name,
-                # "category": str(category.category),
-                "subtask": category.short_name,
-                "hours": category.hours,
-            }
-            for module in self.modules
-            for task in module.tasks
-            for category in task.categories
-        ])
+        rows = []
+        project = self.project_name
+        for module in self.modules:
+            m = module.short_name
+            for task in module.tasks:
+                t = task.short_name
+                for category in task.categories:
+                    rows.append({
+                        "project": project,
+                        "module": m,
+                        "task": t,
+                        # "category": str(category.category),
+                        "subtask": category.short_name,
+                        "hours": category.hours,
+                    })
+        df = pd.DataFrame(rows)
 
 
         dims = [
@@ -277,46 +321,23 @@ class Modules(BaseModel):
         if not SANKEY_TEMPLATE_PATH.exists():
             return ""
         
-        df = pd.DataFrame([
-            {
-                "project": "P."+self.project_name,
-                "module": "M."+module.short_name,
-                "task": "T."+task.short_name,
-                "subtask": "ST."+category.short_name,
-                "hours": category.hours,
-            }
-            for module in self.modules
-            for task in module.tasks
-            for category in task.categories
-        ])
-        pm_df = (
-            df.groupby(["project", "module"])
-            .agg({"hours": "sum"})
-            .reset_index()
-            .rename(columns={"project": "from", "module": "to", "hours": "value"})
-        )
-        mt_df = (
-            df.groupby(["module", "task"])
-            .agg({"hours": "sum"})
-            .reset_index()
-            .rename(columns={"module": "from", "task": "to", "hours": "value"})
-        )
-        ts_df = (
-            df.groupby(["task", "subtask"])
-            .agg({"hours": "sum"})
-            .reset_index()
-            .rename(columns={"task": "from", "subtask": "to", "hours": "value"})
-        )
+        # Sum the hours for every (from, to) link of each level in one pass over the tree
+        project = "P."+self.project_name
+        pm, mt, ts = defaultdict(float), defaultdict(float), defaultdict(float)
+        for module in self.modules:
+            m = "M."+module.short_name
+            for task in module.tasks:
+                t = "T."+task.short_name
+                for category in task.categories:
+                    pm[(project, m)] += category.hours
+                    mt[(m, t)] += category.hours
+                    ts[(t, "ST."+category.short_name)] += category.hours
 
-        three_col_df = pd.concat([
-            pm_df,
-            mt_df,
-            ts_df,
-        ])
-        sankey_data = three_col_df.to_dict(orient="records")
-        html = SANKEY_TEMPLATE_PATH.read_text(encoding="utf-8")
-        html = html.replace("{{SANKEY_JSON}}", json.dumps(sankey_data))
-        return html
-
-    def __hash__(self):
-        return hash(self.to_yaml())
+        # Links sorted within each level, as a groupby would list them
+        sankey_data = [
+            {"from": src, "to": dst, "value": value}
+            for level in (pm, mt, ts)
+            for (src, dst), value in sorted(level.items())
+        ]
+        prefix, suffix = _sankey_template()
+        return prefix + orjson.dumps(sankey_data).decode() + suffix
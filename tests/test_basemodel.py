@@ -0,0 +1,44 @@
+import copy
+
+import pytest
+
+from models.modules import ModuleModel, Modules, TaskCategoryModel, TaskModel
+
+
+@pytest.fixture
+def modules():
+    task = TaskModel(categories=[TaskCategoryModel(category="Backend", hours=h) for h in (1, 2)])
+    m = Modules(project_name="Original", modules=[ModuleModel(tasks=[task])])
+    # Fill the memo before copying
+    m.to_yaml(), hash(m), m == m, m.hours, m.subtasks
+    return m
+
+
+@pytest.mark.parametrize("deep", [False, True])
+def test_model_copy_update_does_not_reuse_memo(modules, deep):
+    copied = modules.model_copy(update={"project_name": "Changed", "modules": []}, deep=deep)
+
+    assert copied.to_yaml() == Modules(project_name="Changed", modules=[]).to_yaml()
+    assert "Changed" in copied.to_yaml()
+    assert copied != modules
+    assert hash(copied) == hash(Modules(project_name="Changed", modules=[]))
+    assert hash(copied) != hash(modules)
+
+
+@pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy])
+def test_copy_gets_its_own_memo(modules, copier):
+    copied = copier(modules)
+
+    assert copied._memo is not modules._memo
+    assert copied == modules
+    assert copied.to_yaml() == modules.to_yaml()
+
+
+@pytest.mark.parametrize("deep", [False, True])
+def test_model_copy_update_recomputes_cached_totals(modules, deep):
+    assert (modules.hours, modules.subtasks) == (3, 2)
+
+    copied = modules.model_copy(update={"modules": []}, deep=deep)
+
+    assert (copied.hours, copied.subtasks) == (0, 0)
+    assert (modules.hours, modules.subtasks) == (3, 2)
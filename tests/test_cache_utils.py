@@ -0,0 +1,93 @@
+import pytest
+
+import db as database
+from helpers import cache_utils as cas
+
+
+class FakeDB:
+    """In-memory stand-in for the `db.getDB` instance"""
+
+    def __init__(self):
+        self.docs = {}
+        self.gets = 0
+
+    def __call__(self, collection):
+        self.collection = collection
+        return self
+
+    def create_index(self, *args, **kwargs):
+        return True
+
+    def get(self, key):
+        self.gets += 1
+        return self.docs.get((self.collection, key), {})
+
+    def upsert(self, value, key):
+        self.docs[(self.collection, key)] = value
+        return True
+
+    def upsert_many(self, values, keys):
+        for key, value in zip(keys, values):
+            self.upsert(value, key)
+        return self.upsert_many_result
+
+    upsert_many_result = True
+
+    def delete(self, key):
+        return self.docs.pop((self.collection, key), None) is not None
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(database, "getDB", fake, raising=False)
+    monkeypatch.setattr(cas, "_L1", {})
+    monkeypatch.setattr(cas, "_L1_INVALIDATED", {})
+    return fake
+
+
+def test_l1_hits_return_copies(fake_db):
+    cas.save("k", "coll", {"resp": ["a", "b"]}, expire_after_seconds=None)
+
+    first = cas.load("k", "coll")
+    first["resp"].append("mutated")
+    second = cas.load("k", "coll")
+    second["resp"].append("mutated")
+
+    assert cas.load("k", "coll") == {"resp": ["a", "b"]}
+    assert fake_db.gets == 1
+
+
+def test_load_save_load_sees_the_new_value(fake_db):
+    cas.save("k", "coll", {"v": 1}, expire_after_seconds=None)
+    assert cas.load("k", "coll") == {"v": 1}
+
+    cas.save("k", "coll", {"v": 2}, expire_after_seconds=None)
+
+    assert cas.load("k", "coll") == {"v": 2}
+
+
+def test_fetch_racing_a_save_is_not_cached(fake_db, monkeypatch):
+    cas.save("k", "coll", {"v": 1}, expire_after_seconds=None)
+    get = FakeDB.get
+
+    def get_then_save(self, key):
+        # The old document is read, then another thread saves before it is put in the L1
+        doc = get(self, key)
+        monkeypatch.setattr(FakeDB, "get", get)
+        cas.save("k", "coll", {"v": 2}, expire_after_seconds=None)
+        return doc
+
+    monkeypatch.setattr(FakeDB, "get", get_then_save)
+
+    assert cas.load("k", "coll") == {"v": 1}
+    assert cas.load("k", "coll") == {"v": 2}
+
+
+def test_save_many_only_logs_success_when_written(fake_db, caplog):
+    caplog.set_level("INFO")
+    fake_db.upsert_many_result = False
+
+    assert cas.save_many([("a", {"v": 1}), ("b", {"v": 2})], "coll") is False
+    assert "SAVED" not in caplog.text
+    assert "FAILED" in caplog.text
@@ -0,0 +1,10 @@
+from helpers.text_utils import text_replacer
+
+
+def test_curly_keys_with_non_word_characters_are_replaced():
+    assert text_replacer("Hi {first-name}!", {"first-name": "X"}) == "Hi X!"
+
+
+def test_missing_keys_are_left_and_warned_about(caplog):
+    assert text_replacer("Hi {a} {b}", {"a": 1}) == "Hi 1 {b}"
+    assert "{'b'}" in caplog.text